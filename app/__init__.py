@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 # from flask_admin import Admin
 from flask_restful import Api
@@ -7,13 +8,23 @@ from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow
 from flask_cors import CORS
 from config import Config
+from app.compression import init_compression
+from app.db_profile import apply_engine_profile
+from app.logging_setup import configure_logging
+from app.metrics import init_metrics
+from app.serialization import FastJSONProvider
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
+configure_logging(app)
 api = Api(app)
 jwt = JWTManager(app)
+apply_engine_profile(app)
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+init_metrics(app)
+init_compression(app)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(__file__), "migrations"))
 ma = Marshmallow(app)
 CORS(app)
 
@@ -0,0 +1,100 @@
+import logging
+import os
+import pickle
+import uuid
+
+from app.train import ARTIFACT_DIR, _atomic_write
+
+logger = logging.getLogger(__name__)
+
+AD_MODEL_PATH = os.path.join(ARTIFACT_DIR, "ad_model.pkl")
+AD_VERSION_PATH = os.path.join(ARTIFACT_DIR, "ad_model.version")
+AD_DATA_PATH = os.path.join(ARTIFACT_DIR, "data", "Advertising_new.csv")
+AD_FEATURES = ("tv", "radio", "newspaper")  # Column order the Lasso is fitted with
+AD_TARGET = "sales"
+AD_ALPHA = 6000
+
+
+def _no_progress(**fields):
+    pass
+
+
+def read_advertising_csv(path: str, chunk_size: int, report_progress=_no_progress):
+    """Read the CSV `chunk_size` rows at a time into float matrices (X, y)."""
+    import numpy as np
+    import pandas as pd
+
+    X_chunks, y_chunks, rows = [], [], 0
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk.columns = [column.strip().lower() for column in chunk.columns]
+        X_chunks.append(chunk[list(AD_FEATURES)].to_numpy(dtype=np.float64))
+        y_chunks.append(chunk[AD_TARGET].to_numpy(dtype=np.float64))
+        rows += len(chunk)
+        report_progress(stage="reading", rows=rows)
+
+    if not rows:
+        raise ValueError(f"[ERROR] No rows in {path}")
+    return np.concatenate(X_chunks), np.concatenate(y_chunks)
+
+
+def _previous_coefficients():
+    try:
+        with open(AD_MODEL_PATH, "rb") as f:
+            previous = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    coef = getattr(previous, "coef_", None)
+    return coef if coef is not None and coef.shape == (len(AD_FEATURES),) else None
+
+
+def train_ad_model(report_progress=_no_progress, warm_start: bool = False, chunk_size: int = 50000) -> dict:
+    """Fit the ad revenue Lasso, evaluate it, refit on all rows and swap the pickle in atomically.
+
+    With `warm_start`, coordinate descent starts from the saved model's
+    coefficients, which converges in a few passes when new rows were only
+    appended. The full-data refit always starts from the evaluation fit.
+    """
+    import numpy as np
+    from sklearn.linear_model import Lasso
+    from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+    from sklearn.model_selection import train_test_split
+
+    if not os.path.exists(AD_DATA_PATH):
+        raise FileNotFoundError(f"[ERROR] Data file not found at {AD_DATA_PATH}")
+
+    X, y = read_advertising_csv(AD_DATA_PATH, chunk_size, report_progress)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.20, random_state=42)
+
+    report_progress(stage="evaluating")
+    model = Lasso(alpha=AD_ALPHA, warm_start=True)
+    previous_coef = _previous_coefficients() if warm_start else None
+    if previous_coef is not None:
+        model.coef_ = previous_coef.copy()
+    model.fit(X_train, y_train)
+
+    # ✅ Predict the test split once and score both metrics from it
+    y_pred = model.predict(X_test)
+    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    mape = float(mean_absolute_percentage_error(y_test, y_pred))
+
+    report_progress(stage="refitting")
+    model.fit(X, y)
+    model.warm_start = False
+
+    report_progress(stage="saving")
+    version = uuid.uuid4().hex
+
+    def write_model(p):
+        with open(p, "wb") as f:
+            pickle.dump(model, f)
+
+    def write_version(p):
+        with open(p, "w") as f:
+            f.write(version)
+
+    # Model first, marker last: workers reload only once the marker changes
+    _atomic_write(AD_MODEL_PATH, write_model)
+    _atomic_write(AD_VERSION_PATH, write_version)
+
+    logger.info(f"Ad model retrained on {len(y)} rows, RMSE {rmse:.4f}, MAPE {mape:.4f}")
+    return {"rmse": rmse, "mape": mape, "rows": int(len(y)), "warm_start": previous_coef is not None}
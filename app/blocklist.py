@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db, jwt
+from app.models import TokenBlocklist
+from config import Config
+
+
+class RevokedTokens:
+    """Per-worker copy of the token_blocklist table for O(1) revocation checks.
+
+    Revocations are written to the table (shared by every worker) and to the
+    local dict. Other workers pick them up by reading only rows newer than
+    the last one they saw, at most once every `sync_interval` seconds, so a
+    token revoked elsewhere stops working within that window. Entries are
+    dropped once the token would have expired anyway.
+    """
+
+    def __init__(self, sync_interval: float = 1.0):
+        self.sync_interval = sync_interval
+
+        self._expires: Dict[str, float] = {}
+        self._last_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        now = time.time()
+        if now >= self._next_sync:
+            self._sync(now)
+
+        expires_at = self._expires.get(jti)
+        return expires_at is not None and expires_at > now
+
+    def revoke(self, jwt_payload: dict) -> None:
+        expires_at = jwt_payload.get("exp")
+        entry = TokenBlocklist(
+            jti=jwt_payload["jti"],
+            token_type=jwt_payload.get("type", "access"),
+            user_id=jwt_payload.get("sub"),
+            expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc).replace(tzinfo=None) if expires_at else None,
+        )
+        try:
+            entry.save_to_db()
+        except IntegrityError:
+            # The same token logged out twice at once: the other request already revoked it
+            db.session.rollback()
+        with self._lock:  # _sync iterates the dict while holding it
+            self._expires[entry.jti] = expires_at or float("inf")
+
+    def _sync(self, now: float) -> None:
+        # Only one thread per worker refreshes; the others keep using the current dict
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            rows = (
+                db.session.query(TokenBlocklist.id, TokenBlocklist.jti, TokenBlocklist.expires_at)
+                .filter(TokenBlocklist.id > self._last_id)
+                .order_by(TokenBlocklist.id)
+                .all()
+            )
+            for row_id, jti, expires_at in rows:
+                self._expires[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp() if expires_at else float("inf")
+                self._last_id = row_id
+
+            expired = [jti for jti, expires_at in self._expires.items() if expires_at <= now]
+            for jti in expired:
+                del self._expires[jti]
+
+            self._next_sync = now + self.sync_interval
+        finally:
+            self._lock.release()
+
+    def purge_expired(self) -> int:
+        """Delete table rows for tokens that have expired. Returns how many were removed."""
+        removed = TokenBlocklist.query.filter(TokenBlocklist.expires_at < datetime.utcnow()).delete()
+        db.session.commit()
+        return removed
+
+
+revoked_tokens = RevokedTokens(sync_interval=Config.JWT_BLOCKLIST_SYNC_INTERVAL)
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
+    return revoked_tokens.is_revoked(jwt_payload["jti"])
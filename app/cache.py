@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config import Config
+
+
+class LocalCacheBackend:
+    """In-process LRU with per-entry TTL. Each worker has its own copy."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """Cache shared by every worker through Redis. Needs the optional `redis` package."""
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "predict:"):
+        import redis  # Optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        # Keys carry the model version, so entries for an old model just expire
+        pass
+
+    def __len__(self) -> int:
+        return -1
+
+
+class PredictionCache:
+    """Predictions keyed on (model version, encoded feature row).
+
+    A retrained model has a new version, so it never reads the old model's
+    entries. Changed diet data encodes to a different row, and so a
+    different key, so entries never need dropping per user; stale ones age
+    out of the LRU or TTL.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(version: str, row) -> str:
+        return f"{version}:{hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()}"
+
+    def get(self, version: str, row) -> Optional[Any]:
+        value = self.backend.get(self.make_key(version, row))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, version: str, row, value: Any) -> None:
+        self.backend.set(self.make_key(version, row), value)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+def _make_backend(config=Config):
+    if config.PREDICTION_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(config.PREDICTION_CACHE_URL, ttl=config.PREDICTION_CACHE_TTL)
+    return LocalCacheBackend(max_size=config.PREDICTION_CACHE_SIZE, ttl=config.PREDICTION_CACHE_TTL)
+
+
+prediction_cache = PredictionCache(_make_backend())
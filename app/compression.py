@@ -0,0 +1,46 @@
+import gzip
+
+from flask import request
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/csv", "text/html"}
+
+
+def init_compression(app) -> None:
+    """Compress response bodies of at least COMPRESS_MIN_SIZE bytes for clients that accept it.
+
+    Brotli is preferred when the optional `brotli` package is installed and
+    the client sends `br`, otherwise gzip. Streamed responses (NDJSON) are
+    left alone so they keep flushing row by row. COMPRESS_MIN_SIZE = 0 turns
+    compression off.
+    """
+    min_size = app.config["COMPRESS_MIN_SIZE"]
+    if min_size <= 0:
+        return
+    gzip_level = app.config["COMPRESS_GZIP_LEVEL"]
+    brotli_quality = app.config["COMPRESS_BROTLI_QUALITY"]
+    try:
+        import brotli  # Optional dependency
+    except ImportError:
+        brotli = None
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"] and accepted["br"] >= accepted["gzip"]:
+            response.set_data(brotli.compress(data, quality=brotli_quality))
+            response.headers["Content-Encoding"] = "br"
+        elif accepted["gzip"]:
+            response.set_data(gzip.compress(data, compresslevel=gzip_level, mtime=0))
+            response.headers["Content-Encoding"] = "gzip"
+        return response
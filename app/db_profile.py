@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Checkout wait time and exhaustion counters for InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self, pool=None) -> dict:
+        """Counters so far, plus the occupancy of `pool` (pass the engine's current pool).
+
+        The pool is read at call time rather than remembered: `engine.dispose()`
+        (e.g. after a fork) replaces it, and the old one must not be counted.
+        """
+        snapshot = {
+            "checkouts": self.checkouts,
+            "exhausted": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1e3, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1e3, 3),
+            "checked_out": 0,
+            "pool_size": 0,
+            "overflow": 0,
+        }
+        if isinstance(pool, QueuePool):  # In-memory SQLite uses a StaticPool
+            snapshot.update(checked_out=pool.checkedout(), pool_size=pool.size(), overflow=max(pool.overflow(), 0))
+        return snapshot
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited and when it timed out."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    SQLite gets a busy timeout (the pragmas are set per connection below);
+    server databases get a sized, recycled, pre-pinged QueuePool and a
+    per-statement timeout.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+
+    if url.get_backend_name() == "sqlite":
+        options = {"connect_args": {"timeout": config["SQLITE_BUSY_TIMEOUT_MS"] / 1000}}
+        # In-memory databases rely on Flask-SQLAlchemy's StaticPool
+        if url.database and url.database != ":memory:":
+            options["poolclass"] = InstrumentedQueuePool
+        return options
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": True,
+    }
+    timeout_ms = config["DB_STATEMENT_TIMEOUT_MS"]
+    if timeout_ms:
+        if url.get_backend_name() == "postgresql":
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+        elif url.get_backend_name() == "mysql":
+            options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={timeout_ms}"}
+    return options
+
+
+def apply_engine_profile(app) -> None:
+    """Fill in SQLALCHEMY_ENGINE_OPTIONS. Call before `SQLAlchemy(app)`."""
+    options = engine_options(app.config)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})  # Explicit settings win
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    pragmas = (
+        "PRAGMA journal_mode=WAL",  # Readers no longer block the writer
+        "PRAGMA synchronous=NORMAL",  # Safe with WAL, avoids an fsync per commit
+        f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+        "PRAGMA temp_store=MEMORY",
+    )
+
+    @event.listens_for(Engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
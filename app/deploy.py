@@ -0,0 +1,134 @@
+import fcntl
+import hashlib
+import hmac
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.jobs import Job, JobStore
+from app.process_local import ProcessLocal
+from app.train import ARTIFACT_DIR
+
+logger = logging.getLogger(__name__)
+
+LOCK_PATH = os.path.join(ARTIFACT_DIR, "deploy.lock")
+LAST_DEPLOYED_PATH = os.path.join(ARTIFACT_DIR, "deploy.last")  # Key of the last successful deployment
+
+Step = Tuple[str, Callable[[], None]]
+
+
+def verify_github_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+class Deployment(Job):
+    RECORD_FIELDS = Job.RECORD_FIELDS + ("key", "step_timings")
+
+    def __init__(self, key: Optional[str], steps: Sequence[Step]):
+        super().__init__()
+        self.key = key
+        self.steps = list(steps)
+        self.step_timings: List[dict] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "deploy_id": self.id,
+            "key": self.key,
+            "state": self.state,
+            "steps": self.step_timings,
+            "error": self.error,
+        }
+
+
+class DeploymentRunner:
+    """Runs deployment steps one deployment at a time on a single background thread.
+
+    Deployments are keyed (e.g. by the pushed commit SHA): submitting a key
+    that is already queued, running or was deployed recently returns the
+    existing deployment instead of running the steps again. A deployment
+    without a key is never deduplicated. Deployments are kept in a JobStore,
+    so duplicates are caught and status is reported across worker processes.
+
+    Every gunicorn worker has its own runner, so runs are also serialised
+    across processes with an flock on LOCK_PATH, and a key another worker
+    has just deployed is skipped instead of pulling and migrating twice.
+    """
+
+    def __init__(self, max_history: int = 50):
+        self._store = JobStore("deployments", Deployment, max_history)
+        # A single thread runs deployments one at a time, in the order they were submitted
+        self._executor = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="deployment-runner"))
+
+    def submit(self, key: Optional[str], steps: Sequence[Step]):
+        """Queue a deployment. Returns (deployment, created); created is False for duplicates."""
+        with self._store.locked():
+            if key:
+                existing = next((d for d in reversed(self._store.jobs()) if d.key == key), None)
+                if existing is not None and existing.state != "failed":
+                    return existing, False
+
+            deployment = Deployment(key, steps)
+            self._store.add(deployment)
+        self._executor.get().submit(self._run, deployment)
+        return deployment, True
+
+    def get(self, deploy_id: str) -> Optional[Deployment]:
+        return self._store.load(deploy_id)
+
+    def _run(self, deployment: Deployment) -> None:
+        try:
+            # Blocks while another worker deploys: two git pulls or migrate runs at once would collide
+            with open(LOCK_PATH, "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if deployment.key and _last_deployed_key() == deployment.key:
+                    deployment.finish("skipped")
+                    logger.info(f"Deployment {deployment.id} skipped, {deployment.key} was deployed by another worker")
+                    return
+                self._run_steps(deployment)
+                if deployment.state == "succeeded" and deployment.key:
+                    with open(LAST_DEPLOYED_PATH, "w") as f:
+                        f.write(deployment.key)
+        except OSError as e:
+            # The executor would swallow this, leaving the deployment queued forever
+            if not deployment.done:
+                deployment.finish("failed", str(e))
+            logger.error(f"Deployment {deployment.id} failed: {e}")
+        finally:
+            self._store.save(deployment)
+
+    def _run_steps(self, deployment: Deployment) -> None:
+        deployment.start()
+        self._store.save(deployment)
+        logger.info(f"Deployment {deployment.id} started for {deployment.key}")
+        for name, step in deployment.steps:
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                deployment.step_timings.append({"step": name, "seconds": round(time.perf_counter() - start, 3), "ok": False})
+                deployment.finish("failed", f"{name}: {e}")
+                logger.error(f"Deployment {deployment.id} failed at {name}: {e}")
+                return
+            deployment.step_timings.append({"step": name, "seconds": round(time.perf_counter() - start, 3), "ok": True})
+            self._store.save(deployment)
+
+        deployment.finish("succeeded")
+        logger.info(f"Deployment {deployment.id} finished: {deployment.step_timings}")
+
+
+def _last_deployed_key() -> Optional[str]:
+    try:
+        with open(LAST_DEPLOYED_PATH) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+deployments = DeploymentRunner()
@@ -0,0 +1,54 @@
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+# Raw DietData columns the model is trained on, in training order
+NUMERIC_FEATURES = ("age", "height", "weight")
+CATEGORICAL_FEATURES = ("gender", "activity_level", "goal", "dietary_preference")
+RAW_FEATURES = ("age", "gender", "height", "weight", "activity_level", "goal", "dietary_preference")
+
+
+class FeatureEncoder:
+    """One-hot encoder compiled from the feature columns saved by `train_model()`.
+
+    Produces the same float64 values as `pd.get_dummies(df).reindex(columns=feature_columns,
+    fill_value=0)`, but writes straight into a NumPy row: numeric fields are copied to their
+    column and each categorical value sets the `<field>_<value>` column to 1. Unknown
+    categories leave their group at zero, like the reindex does.
+    """
+
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+
+        index = {column: i for i, column in enumerate(self.feature_columns)}
+        self._numeric = [(name, index[name]) for name in NUMERIC_FEATURES if name in index]
+        self._index = index
+
+    def encode(self, record: Mapping, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode one record into a 1-D row (written into `out` when given)."""
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float64)
+        else:
+            out.fill(0)
+
+        for name, i in self._numeric:
+            out[i] = record[name]
+
+        for name in CATEGORICAL_FEATURES:
+            value = record.get(name)
+            if value is None:
+                continue
+            i = self._index.get(f"{name}_{value}")
+            if i is not None:
+                out[i] = 1
+
+        return out
+
+    def transform(self, records: Iterable[Mapping]) -> np.ndarray:
+        """Encode many records into one (n_records, n_features) matrix."""
+        records = list(records)
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for row, record in zip(X, records):
+            self.encode(record, out=row)
+        return X
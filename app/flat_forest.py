@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class FlatForest:
+    """A fitted RandomForestClassifier flattened into a few plain NumPy arrays.
+
+    sklearn copies every tree into private C buffers on unpickle, so each
+    worker ends up with its own copy of the forest. These arrays instead can
+    be loaded with `joblib.load(..., mmap_mode="r")` and read straight from
+    the page cache, so all workers on a box share one physical copy.
+
+    All trees are concatenated: node ids are global, every tree's root is in
+    `roots`, and leaves point to themselves. Traversal steps every (sample,
+    tree) pair at once and drops the pairs that have reached a leaf, so a
+    step only costs as much as the paths still being walked.
+    """
+
+    def __init__(self, children_left, children_right, feature, threshold, value, roots, max_depth, classes):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+
+    @classmethod
+    def from_forest(cls, forest) -> "FlatForest":
+        lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int64) + offset
+            leaf = tree.children_left == -1
+
+            lefts.append(np.where(leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(leaf, node_ids, tree.children_right + offset))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+
+            # Same per-leaf normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            children_left=np.concatenate(lefts).astype(np.int32),
+            children_right=np.concatenate(rights).astype(np.int32),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            classes=np.asarray(forest.classes_),
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node id for every (sample, tree) pair."""
+        # Trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n_samples = X.shape[0]
+        nodes = np.tile(self.roots, n_samples)  # Sample-major: pair i is (i // n_trees, i % n_trees)
+        samples = np.repeat(np.arange(n_samples), self.n_estimators)
+
+        pending = np.flatnonzero(self.children_left[nodes] != nodes)
+        while pending.size:
+            current = nodes[pending]
+            go_left = X[samples[pending], self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.children_left[current], self.children_right[current])
+            nodes[pending] = current
+            pending = pending[self.children_left[current] != current]
+        return nodes.reshape(n_samples, self.n_estimators)
+
+    def predict_proba(self, X) -> np.ndarray:
+        # Summed tree by tree then divided, in the same order as the forest does it
+        proba = np.zeros((len(X), self.value.shape[1]), dtype=np.float64)
+        for leaves in self.apply(X).T:
+            proba += self.value[leaves]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
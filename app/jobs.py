@@ -0,0 +1,270 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from app.process_local import ProcessLocal
+from app.train import ARTIFACT_DIR, _atomic_write
+
+logger = logging.getLogger(__name__)
+
+LOCK_PATH = os.path.join(ARTIFACT_DIR, "diet_model.lock")
+JOBS_DIR = os.path.join(ARTIFACT_DIR, "jobs")
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class TrainingInProgress(RuntimeError):
+    """Another worker process holds the training lock."""
+
+
+def run_training_job() -> dict:
+    """Train in the pool process and return only what the parent needs (picklable)."""
+    from sklearn.metrics import accuracy_score
+    from app.train import train_model
+
+    # Serialises training across gunicorn workers, not just within this one
+    with open(LOCK_PATH, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise TrainingInProgress("Another worker is already training the model")
+
+        trained = train_model()
+        if trained is None:
+            return {"accuracy": None, "message": "No new training data, the current model was kept"}
+        model, X_test, y_test = trained
+        accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    return {"accuracy": round(float(accuracy), 4)}
+
+
+class Job:
+    """State and timestamps shared by background jobs (training runs, deployments)."""
+
+    FINAL_STATES = ("succeeded", "failed", "rejected", "skipped")
+    RECORD_FIELDS = ("id", "state", "submitted_at", "started_at", "finished_at", "error", "pid")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.state = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.pid = os.getpid()  # The worker process that runs the job
+
+    @property
+    def done(self) -> bool:
+        return self.state in self.FINAL_STATES
+
+    @property
+    def duration(self) -> Optional[float]:
+        if not self.started_at:
+            return None
+        return round((self.finished_at or time.time()) - self.started_at, 3)
+
+    def start(self) -> None:
+        self.state = "running"
+        self.started_at = time.time()
+
+    def finish(self, state: str, error: Optional[str] = None) -> None:
+        self.finished_at = time.time()
+        self.error = error
+        self.state = state
+
+    def to_record(self) -> dict:
+        return {name: getattr(self, name) for name in self.RECORD_FIELDS}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Job":
+        job = cls.__new__(cls)
+        job.__dict__.update(record)
+        return job
+
+
+class JobStore:
+    """Job records kept as JSON files under JOBS_DIR/<name>, readable by every worker process.
+
+    The worker running a job saves it after every change, so a status poll
+    can land on any worker. A job still unfinished after its worker exited
+    is reported as failed. At most `max_size` finished jobs are kept.
+    """
+
+    def __init__(self, name: str, job_class: type, max_size: int = 100):
+        self.directory = os.path.join(JOBS_DIR, name)
+        self.job_class = job_class
+        self.max_size = max_size
+
+    @contextmanager
+    def locked(self):
+        """Hold the store's cross-process lock, e.g. to look for a running job and add one atomically."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def save(self, job: Job) -> None:
+        def write(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(job.to_record(), f)
+
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write(self._path(job.id), write)
+
+    def load(self, job_id: str) -> Optional[Job]:
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                job = self.job_class.from_record(json.load(f))
+        except FileNotFoundError:
+            return None
+
+        if not job.done and not _process_alive(job.pid):
+            job.finish("failed", "The worker running this job exited before it finished")
+            self.save(job)
+        return job
+
+    def jobs(self) -> List[Job]:
+        """Every stored job, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        jobs = [self.load(name[:-len(".json")]) for name in names if name.endswith(".json")]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.submitted_at)
+
+    def add(self, job: Job) -> None:
+        """Save a new job and drop the oldest finished ones past `max_size`. Call it while `locked()`."""
+        self.save(job)
+        jobs = self.jobs()
+        for old in jobs[:max(0, len(jobs) - self.max_size)]:
+            if old.done:
+                try:
+                    os.remove(self._path(old.id))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingJob(Job):
+    RECORD_FIELDS = Job.RECORD_FIELDS + ("result", "progress")
+
+    def __init__(self):
+        super().__init__()
+        self.result: dict = {}
+        self.progress: dict = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "duration_seconds": self.duration,
+            **self.result,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class TrainingJobQueue:
+    """Runs a training function in a single-worker pool, one job at a time.
+
+    With `use_processes` (the default) the fit runs in a separate process so
+    it never holds the web worker's GIL. Thread mode is for fits that release
+    the GIL themselves; there `target` is called with a `report_progress(**fields)`
+    callback that updates the job as it runs.
+
+    A request that arrives while a job is queued or running, in any worker
+    process, gets that job back instead of starting a second fit. Jobs are
+    kept in a JobStore named `name`, so any worker can report on them.
+    `on_success` runs in the worker that ran the job once it succeeds, e.g.
+    to load the new model.
+    """
+
+    def __init__(self, name: str, target: Callable = run_training_job, on_success: Optional[Callable[[], None]] = None,
+                 use_processes: bool = True, max_history: int = 100):
+        self.target = target
+        self.on_success = on_success
+        self.use_processes = use_processes
+
+        self._store = JobStore(name, TrainingJob, max_history)
+        self._executor = ProcessLocal(self._make_executor)
+
+    def submit(self, **kwargs):
+        """Start a training job. Returns (job, created); created is False when coalesced."""
+        with self._store.locked():
+            active = next((job for job in self._store.jobs() if not job.done), None)
+            if active is not None:
+                return active, False
+
+            job = TrainingJob()
+            job.start()
+            self._store.add(job)
+            if not self.use_processes:
+                kwargs["report_progress"] = lambda **fields: self._report_progress(job, fields)
+            future = self._executor.get().submit(self.target, **kwargs)
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job, True
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._store.load(job_id)
+
+    def _report_progress(self, job: TrainingJob, fields: dict) -> None:
+        job.progress.update(fields)
+        self._store.save(job)
+
+    def _finish(self, job: TrainingJob, future) -> None:
+        try:
+            result = future.result()
+        except TrainingInProgress as e:
+            job.finish("rejected", str(e))
+            self._store.save(job)
+            return
+        except Exception as e:
+            job.finish("failed", str(e))
+            self._store.save(job)
+            logger.error(f"Training job {job.id} failed: {e}")
+            return
+
+        job.result = result
+        job.finish("succeeded")
+        self._store.save(job)
+        logger.info(f"Training job {job.id} finished in {job.duration:.2f}s")
+
+        if self.on_success:
+            try:
+                self.on_success()
+            except Exception as e:
+                logger.error(f"Model reload failed: {e}")
+
+    def _make_executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=1)
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="training-job")
+
+
+def _refresh_diet_model() -> None:
+    # The model was trained in another process; load it here without waiting for the watcher
+    from app.registry import diet_registry
+    diet_registry.refresh()
+
+
+training_jobs = TrainingJobQueue("diet_model", run_training_job, on_success=_refresh_diet_model)
@@ -0,0 +1,100 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+from app.process_local import ProcessLocal
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with request context and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request id and time since the request started.
+
+    Runs in the calling thread, before the record is queued, while the
+    request context is still there.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.request_id = g.get("request_id")
+            record.path = request.path
+            start = g.get("request_start")
+            if start is not None:
+                record.elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+        return True
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """QueueHandler whose listener thread is (re)started in whichever process logs.
+
+    The listener is process-local: gunicorn workers and the training pool
+    each start their own on their first log call.
+    """
+
+    def __init__(self, handler: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.handler = handler
+        self._listener = ProcessLocal(self._start_listener)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self._listener.get()
+        super().enqueue(record)
+
+    def _start_listener(self) -> QueueListener:
+        self.queue = queue.SimpleQueue()  # Records queued before a fork belong to the parent
+        listener = QueueListener(self.queue, self.handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)  # Flush what is still queued on shutdown
+        return listener
+
+
+def configure_logging(app) -> None:
+    """Route all logging through a queue to a background thread that writes to stderr."""
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if app.config["LOG_FORMAT"] == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    handler = BackgroundQueueHandler(stream_handler)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(app.config["LOG_LEVEL"])
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+    @app.after_request
+    def return_request_id(response):
+        if g.get("request_id"):
+            response.headers["X-Request-ID"] = g.request_id
+        return response
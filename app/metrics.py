@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.process_local import ProcessLocal
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in seconds, as Prometheus expects them."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+
+class Metrics:
+    """Per-worker request, SQL and model timings, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.sql_time: Dict[str, Histogram] = defaultdict(Histogram)
+        self.timings: Dict[str, Histogram] = defaultdict(Histogram)
+        self.requests: Counter = Counter()
+        self.sql_queries: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint: str, status: int, seconds: float, queries: int, sql_seconds: float) -> None:
+        self.latency[endpoint].observe(seconds)
+        self.sql_time[endpoint].observe(sql_seconds)
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+            self.sql_queries[endpoint] += queries
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block, e.g. `with metrics.timer("model_predict"): ...`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name].observe(time.perf_counter() - start)
+
+    def render(self, extra: Optional[Dict[str, float]] = None) -> str:
+        lines = []
+        self._render_histograms(lines, "http_request_duration_seconds", "endpoint", self.latency)
+        self._render_histograms(lines, "sql_duration_seconds_per_request", "endpoint", self.sql_time)
+        self._render_histograms(lines, "operation_duration_seconds", "operation", self.timings)
+
+        lines.append("# TYPE http_requests_total counter")
+        for (endpoint, status), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines.append("# TYPE sql_queries_total counter")
+        for endpoint, count in sorted(self.sql_queries.items()):
+            lines.append(f'sql_queries_total{{endpoint="{endpoint}"}} {count}')
+
+        for name, value in (extra or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines, name, label, histograms) -> None:
+        lines.append(f"# TYPE {name} histogram")
+        for key, hist in sorted(histograms.items()):
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{{{label}="{key}"}} {hist.sum:.6f}')
+            lines.append(f'{name}_count{{{label}="{key}"}} {hist.count}')
+
+
+metrics = Metrics()
+
+
+class SlowRequestProfiler:
+    """Opt-in sampling profiler that keeps stacks only for slow requests.
+
+    A daemon thread samples the stack of every thread currently serving a
+    request every `interval` seconds. When a request finishes slower than
+    `threshold`, its samples are written to `output_dir` in the folded
+    format flamegraph.pl and speedscope read ("frame;frame;frame count").
+    """
+
+    def __init__(self, threshold: float, interval: float, output_dir: str):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+
+        self._active: Dict[int, Counter] = {}
+        self._thread = ProcessLocal(self._start_thread)
+
+    def start_request(self) -> None:
+        self._thread.get()
+        self._active[threading.get_ident()] = Counter()
+
+    def finish_request(self, endpoint: str, seconds: float) -> None:
+        samples = self._active.pop(threading.get_ident(), None)
+        if not samples or seconds < self.threshold:
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{int(time.time() * 1000)}-{endpoint.replace('/', '_')}.folded")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def discard_request(self) -> None:
+        self._active.pop(threading.get_ident(), None)
+
+    def _start_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self._sample, name="slow-request-profiler", daemon=True)
+        thread.start()
+        return thread
+
+    def _sample(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if stack:
+                    samples[";".join(reversed(stack))] += 1
+
+
+def init_metrics(app) -> None:
+    """Time every request and count the SQL it runs. Call once after the app is configured."""
+    profiler = None
+    if app.config.get("PROFILE_SLOW_REQUESTS_MS"):
+        profiler = SlowRequestProfiler(
+            threshold=app.config["PROFILE_SLOW_REQUESTS_MS"] / 1000,
+            interval=app.config["PROFILE_SAMPLE_INTERVAL_MS"] / 1000,
+            output_dir=app.config["PROFILE_OUTPUT_DIR"],
+        )
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        # Statements outside a request (training, startup) have no g to count into
+        try:
+            g.sql_queries = g.get("sql_queries", 0) + 1
+            g.sql_seconds = g.get("sql_seconds", 0.0) + elapsed
+        except RuntimeError:
+            pass
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        if profiler:
+            profiler.start_request()
+
+    @app.after_request
+    def record_request(response):
+        start = g.get("request_start")
+        if start is not None:
+            seconds = time.perf_counter() - start
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.observe_request(endpoint, response.status_code, seconds,
+                                    g.get("sql_queries", 0), g.get("sql_seconds", 0.0))
+            if profiler:
+                profiler.finish_request(endpoint, seconds)
+        return response
+
+    if profiler:
+        # Requests that raised never reach after_request
+        app.teardown_request(lambda exc: profiler.discard_request())
@@ -0,0 +1,62 @@
+"""baseline users and diet_data
+
+Revision ID: 5d1c2e7a9b10
+Revises: 
+Create Date: 2026-10-17 16:40:00.000000
+
+Databases created earlier by db.create_all() or an untracked autogenerate
+already have these tables; they are left alone apart from adding the
+recommended_diet label column when it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1c2e7a9b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'users' not in tables:
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('first_name', sa.String(length=150), nullable=True),
+            sa.Column('last_name', sa.String(length=150), nullable=True),
+            sa.Column('username', sa.String(length=30), nullable=True),
+            sa.Column('password', sa.String(length=150), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'diet_data' not in tables:
+        op.create_table('diet_data',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('age', sa.Integer(), nullable=False),
+            sa.Column('gender', sa.String(length=10), nullable=False),
+            sa.Column('height', sa.Float(), nullable=False),
+            sa.Column('weight', sa.Float(), nullable=False),
+            sa.Column('activity_level', sa.String(length=20), nullable=False),
+            sa.Column('goal', sa.String(length=20), nullable=False),
+            sa.Column('dietary_preference', sa.String(length=20), nullable=False),
+            sa.Column('recommended_diet', sa.String(length=30), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    elif 'recommended_diet' not in [c['name'] for c in inspector.get_columns('diet_data')]:
+        with op.batch_alter_table('diet_data', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('recommended_diet', sa.String(length=30), nullable=True))
+
+
+def downgrade():
+    op.drop_table('diet_data')
+    op.drop_table('users')
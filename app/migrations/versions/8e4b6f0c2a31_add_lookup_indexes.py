@@ -0,0 +1,34 @@
+"""add lookup indexes on users.username and diet_data(user_id, id)
+
+Revision ID: 8e4b6f0c2a31
+Revises: 5d1c2e7a9b10
+Create Date: 2026-10-17 16:45:00.000000
+
+ix_diet_data_user_id_id serves both `filter_by(user_id=...)` and the
+"latest row" lookup `filter_by(user_id=...).order_by(id desc).first()`.
+ix_users_username is unique: remove duplicate usernames before upgrading.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b6f0c2a31'
+down_revision = '5d1c2e7a9b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_username'), ['username'], unique=True)
+
+    with op.batch_alter_table('diet_data', schema=None) as batch_op:
+        batch_op.create_index('ix_diet_data_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('diet_data', schema=None) as batch_op:
+        batch_op.drop_index('ix_diet_data_user_id_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username'))
@@ -0,0 +1,47 @@
+"""add diet_profile
+
+Revision ID: c4a8e2f7d613
+Revises: b7e3d94f1c52
+Create Date: 2026-10-17 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2f7d613'
+down_revision = 'b7e3d94f1c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('diet_profile',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=False),
+        sa.Column('gender', sa.String(length=10), nullable=False),
+        sa.Column('height', sa.Float(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('activity_level', sa.String(length=20), nullable=False),
+        sa.Column('goal', sa.String(length=20), nullable=False),
+        sa.Column('dietary_preference', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Each user's current profile is their latest diet_data row
+    op.execute("""
+        INSERT INTO diet_profile (user_id, age, gender, height, weight, activity_level, goal,
+                                  dietary_preference, created_at, updated_at)
+        SELECT d.user_id, d.age, d.gender, d.height, d.weight, d.activity_level, d.goal,
+               d.dietary_preference, COALESCE(d.created_at, CURRENT_TIMESTAMP), COALESCE(d.updated_at, CURRENT_TIMESTAMP)
+        FROM diet_data d
+        JOIN (SELECT MAX(id) AS id FROM diet_data GROUP BY user_id) latest ON latest.id = d.id
+    """)
+
+
+def downgrade():
+    op.drop_table('diet_profile')
@@ -0,0 +1,31 @@
+"""add ix_users_id
+
+Revision ID: e2b7c9d4a058
+Revises: c4a8e2f7d613
+Create Date: 2026-10-18 09:10:00.000000
+
+Users.id is declared with index=True. Databases made by db.create_all()
+already have ix_users_id, but the baseline revision never created it, so
+autogenerate kept reporting the index as missing. Created only where absent.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c9d4a058'
+down_revision = 'c4a8e2f7d613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('users')}
+    if 'ix_users_id' not in indexes:
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_id'))
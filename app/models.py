@@ -2,10 +2,10 @@ from typing import List
 from datetime import datetime, date, timedelta
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy import or_
-from werkzeug.security import generate_password_hash, check_password_hash
 
 
 from app import app, db
+from app.security import password_hasher
 
 
 class Users(db.Model):
@@ -14,7 +14,7 @@ class Users(db.Model):
     id = db.Column(db.Integer, primary_key=True, index=True)
     first_name = db.Column(db.String(150))
     last_name = db.Column(db.String(150))
-    username = db.Column(db.String(30))
+    username = db.Column(db.String(30), unique=True, index=True)
     password = db.Column(db.String(150))
     created_at = db.Column(db.DateTime, default=datetime.now())
     updated_at = db.Column(db.DateTime, default=datetime.now())
@@ -30,11 +30,15 @@ class Users(db.Model):
 
       # hash user password input
     def set_password(self, password: str):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     # verify user password input hash with existing password hash
     def check_password(self, password: str):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
+
+    # hash made with older parameters than PASSWORD_HASH_METHOD
+    def needs_rehash(self) -> bool:
+        return password_hasher.needs_rehash(self.password)
 
     @classmethod
     def find_by_username(cls, username: str) -> "Users":
@@ -46,6 +50,10 @@ class Users(db.Model):
     
 class DietData(db.Model):
     __tablename__ = 'diet_data'
+    __table_args__ = (
+        # Covers filter_by(user_id) and the "latest row" lookup ordered by id desc
+        db.Index('ix_diet_data_user_id_id', 'user_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Foreign key linking to Users table
@@ -56,8 +64,10 @@ class DietData(db.Model):
     activity_level = db.Column(db.String(20), nullable=False)
     goal = db.Column(db.String(20), nullable=False)
     dietary_preference = db.Column(db.String(20), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now())
-    updated_at = db.Column(db.DateTime, default=datetime.now())
+    recommended_diet = db.Column(db.String(30), nullable=True)  # Label, set on rows usable for training
+    # Callables, so each row gets its insert time (Last-Modified of /diet is built from updated_at)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     # Define relationship with Users table
     user = db.relationship('Users', backref=db.backref('diet_data', lazy=True))
@@ -72,4 +82,97 @@ class DietData(db.Model):
         db.session.commit()
 
 
+PROFILE_FIELDS = ("age", "gender", "height", "weight", "activity_level", "goal", "dietary_preference")
+
+
+def _dialect_insert(table):
+    """INSERT that supports ON CONFLICT / ON DUPLICATE KEY for the bound database."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table), dialect
+
+
+class DietProfile(db.Model):
+    """Each user's current diet data: one row per user, kept up to date by upsert.
+
+    `diet_data` is the append-only history; this table answers "latest diet
+    data for user X" with a primary-key read.
+    """
+    __tablename__ = 'diet_profile'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    age = db.Column(db.Integer, nullable=False)
+    gender = db.Column(db.String(10), nullable=False)
+    height = db.Column(db.Float, nullable=False)
+    weight = db.Column(db.Float, nullable=False)
+    activity_level = db.Column(db.String(20), nullable=False)
+    goal = db.Column(db.String(20), nullable=False)
+    dietary_preference = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def upsert(cls, user_id: int, fields: dict, now: datetime):
+        """Create or update one profile in a single statement and return the resulting row.
 
+        `fields` must hold every PROFILE_FIELDS column: the INSERT half has to
+        be a valid row before ON CONFLICT is considered. created_at ==
+        updated_at on the returned row exactly when this call created it.
+        """
+        stmt, dialect = _dialect_insert(cls.__table__)
+        stmt = stmt.values(user_id=user_id, created_at=now, updated_at=now, **fields)
+        changes = {**fields, "updated_at": now}
+
+        if dialect == "mysql":
+            # No RETURNING on MySQL; the follow-up read is by primary key
+            db.session.execute(stmt.on_duplicate_key_update(**changes))
+            return db.session.execute(db.select(cls.__table__).where(cls.user_id == user_id)).one()
+
+        stmt = stmt.on_conflict_do_update(index_elements=[cls.user_id], set_=changes)
+        return db.session.execute(stmt.returning(*cls.__table__.columns)).one()
+
+    @classmethod
+    def update_fields(cls, user_id: int, fields: dict, now: datetime):
+        """Change some fields of an existing profile in one UPDATE; returns the row, or None if there is none."""
+        stmt = db.update(cls.__table__).where(cls.user_id == user_id).values(**fields, updated_at=now)
+
+        if db.session.get_bind().dialect.name == "mysql":
+            db.session.execute(stmt)
+            return db.session.execute(db.select(cls.__table__).where(cls.user_id == user_id)).one_or_none()
+
+        return db.session.execute(stmt.returning(*cls.__table__.columns)).one_or_none()
+
+    @classmethod
+    def upsert_many(cls, rows: List[dict], now: datetime) -> None:
+        """Set the profiles for many users (one full row each) in a single statement."""
+        if not rows:
+            return
+        stmt, dialect = _dialect_insert(cls.__table__)
+        stmt = stmt.values([{**row, "created_at": now, "updated_at": now} for row in rows])
+
+        if dialect == "mysql":
+            changes = {name: stmt.inserted[name] for name in (*PROFILE_FIELDS, "updated_at")}
+            db.session.execute(stmt.on_duplicate_key_update(**changes))
+        else:
+            changes = {name: stmt.excluded[name] for name in (*PROFILE_FIELDS, "updated_at")}
+            db.session.execute(stmt.on_conflict_do_update(index_elements=[cls.user_id], set_=changes))
+
+
+class TokenBlocklist(db.Model):
+    __tablename__ = 'token_blocklist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True, index=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.String(36))
+    expires_at = db.Column(db.DateTime, index=True)  # UTC; the row can be purged after this
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def save_to_db(self) -> None:
+        db.session.add(self)
+        db.session.commit()
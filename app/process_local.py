@@ -0,0 +1,36 @@
+import os
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ProcessLocal(Generic[T]):
+    """A value built lazily, once in every process that uses it.
+
+    Threads do not survive fork: a pool, listener or watcher thread created
+    before gunicorn forks its workers (or before the training pool forks)
+    is dead in the child. `get()` calls `factory` on first use in each
+    process and returns that value for the rest of the process's life.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self.factory = factory
+
+        self._value: Optional[T] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        # A lock held by another thread at fork time would stay locked in the child
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def get(self) -> T:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._value = self.factory()
+                    self._pid = pid
+        return self._value
+
+    def _reset_lock(self) -> None:
+        self._lock = threading.Lock()
@@ -0,0 +1,178 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+
+from app.ad_model import AD_FEATURES, AD_MODEL_PATH, AD_VERSION_PATH
+from app.cache import prediction_cache
+from app.metrics import metrics
+from app.process_local import ProcessLocal
+from app.train import ARTIFACT_DIR, MODEL_PATH, FLAT_MODEL_PATH, FEATURES_PATH, VERSION_PATH
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModelBundle(NamedTuple):
+    """A model and everything needed to call it, swapped in as one unit."""
+    model: Any
+    feature_columns: Any
+    version: str
+    encoder: Any = None
+
+
+class ModelRegistry:
+    """Keeps one loaded copy of a model per worker process.
+
+    The current bundle is replaced by a single reference assignment, so a
+    request always sees a model and feature list that belong together. New
+    artifacts are picked up by a background watcher thread that polls the
+    version marker, which keeps unpickling off the request path.
+    """
+
+    def __init__(self, version_path: str, watched_paths: Sequence[str],
+                 loader: Callable[[], tuple], check_interval: float = 2.0,
+                 encoder_factory: Optional[Callable[[Any], Any]] = None):
+        self.version_path = version_path
+        self.watched_paths = list(watched_paths)
+        self.loader = loader
+        self.encoder_factory = encoder_factory
+        self.check_interval = check_interval
+
+        self._bundle: Optional[ModelBundle] = None
+        self._listeners: list = []
+        self._lock = threading.Lock()
+        self._watcher = ProcessLocal(self._start_watcher)
+
+    def current_version(self) -> Optional[str]:
+        """Version of the artifacts on disk, or None if nothing is trained yet."""
+        try:
+            with open(self.version_path) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            pass
+
+        # Artifacts written before version markers existed
+        try:
+            stats = [os.stat(path) for path in self.watched_paths]
+        except FileNotFoundError:
+            return None
+        return "-".join(f"{st.st_mtime_ns}:{st.st_size}" for st in stats)
+
+    def get(self) -> ModelBundle:
+        """Return the loaded bundle, loading it on first use.
+
+        Raises FileNotFoundError if no model has been trained yet.
+        """
+        if self.check_interval > 0:
+            self._watcher.get()
+
+        bundle = self._bundle
+        if bundle is not None:
+            return bundle
+
+        with self._lock:
+            if self._bundle is None:
+                self._reload(self.current_version())
+            return self._bundle
+
+    def publish(self, model, feature_columns, version: str) -> ModelBundle:
+        """Install an already-loaded model, e.g. right after training in-process."""
+        bundle = self._make_bundle(model, feature_columns, version)
+        with self._lock:
+            self._bundle = bundle
+        self._notify(bundle)
+        return bundle
+
+    def on_swap(self, callback: Callable[[ModelBundle], None]) -> None:
+        """Call `callback(bundle)` whenever a new model is installed."""
+        self._listeners.append(callback)
+
+    def refresh(self) -> bool:
+        """Reload if the artifacts on disk changed. Returns True when swapped."""
+        version = self.current_version()
+        bundle = self._bundle
+        if version is None or (bundle is not None and bundle.version == version):
+            return False
+
+        with self._lock:
+            if self._bundle is not None and self._bundle.version == version:
+                return False
+            self._reload(version)
+        self._notify(self._bundle)
+        return True
+
+    def _reload(self, version: Optional[str]) -> None:
+        if version is None:
+            raise FileNotFoundError(f"[ERROR] No model artifacts at {self.version_path}")
+
+        with metrics.timer("model_load"):
+            model, feature_columns = self.loader()
+        self._bundle = self._make_bundle(model, feature_columns, version)
+        logger.info(f"Loaded model version {version}")
+
+    def _make_bundle(self, model, feature_columns, version: str) -> ModelBundle:
+        # The encoder is compiled once here so requests never rebuild it
+        encoder = self.encoder_factory(feature_columns) if self.encoder_factory else None
+        return ModelBundle(model, feature_columns, version, encoder)
+
+    def _notify(self, bundle: ModelBundle) -> None:
+        for callback in self._listeners:
+            callback(bundle)
+
+    def _start_watcher(self) -> threading.Thread:
+        watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+        watcher.start()
+        return watcher
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Model reload failed: {e}")
+
+
+def _load_diet_model():
+    import joblib
+
+    # Flat arrays are mapped read-only, so workers share the page cache instead of copying trees
+    flat_path = os.path.join(ARTIFACT_DIR, FLAT_MODEL_PATH)
+    if Config.DIET_MODEL_MMAP and os.path.exists(flat_path):
+        model = joblib.load(flat_path, mmap_mode="r")
+    else:
+        model = joblib.load(os.path.join(ARTIFACT_DIR, MODEL_PATH))
+    feature_columns = joblib.load(os.path.join(ARTIFACT_DIR, FEATURES_PATH))
+    return model, feature_columns
+
+
+def _diet_encoder(feature_columns):
+    from app.encoder import FeatureEncoder  # NumPy, needed only once a model is loaded
+    return FeatureEncoder(feature_columns)
+
+
+diet_registry = ModelRegistry(
+    version_path=os.path.join(ARTIFACT_DIR, VERSION_PATH),
+    watched_paths=[os.path.join(ARTIFACT_DIR, MODEL_PATH), os.path.join(ARTIFACT_DIR, FEATURES_PATH)],
+    loader=_load_diet_model,
+    encoder_factory=_diet_encoder,
+)
+
+# Entries are keyed by version already; clearing just frees the old model's slots
+diet_registry.on_swap(lambda bundle: prediction_cache.clear())
+
+
+def _load_ad_model():
+    with open(AD_MODEL_PATH, "rb") as f:
+        return pickle.load(f), AD_FEATURES
+
+
+ad_registry = ModelRegistry(
+    version_path=AD_VERSION_PATH,
+    watched_paths=[AD_MODEL_PATH],
+    loader=_load_ad_model,
+)
@@ -1,48 +1,55 @@
-import os
+import json
 from flask_restful import Resource
-from flask import request
+from flask import Response, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import pandas as pd
-import joblib
-from app.train import train_model, load_model
-from sklearn.metrics import accuracy_score
-from app.models import DietData
+from app import db
+from app.cache import prediction_cache
+from app.metrics import metrics
+from app.registry import diet_registry
+from app.jobs import training_jobs
+from app.models import DietProfile
 
 class TrainModelResource(Resource):
     @jwt_required()
     def post(self):
-        model, X_test, y_test = train_model()
-        accuracy = accuracy_score(y_test, model.predict(X_test))
+        """Start training in the background and return the job to poll."""
+        job, created = training_jobs.submit()
+        message = "Model training started" if created else "Model training already in progress"
 
-        return {"message": "Model trained successfully", "accuracy": round(accuracy, 4)}, 200
+        return {"message": message, "job_id": job.id, "status_url": f"/train_model/{job.id}"}, 202
+
+
+class TrainModelJobResource(Resource):
+    @jwt_required()
+    def get(self, job_id):
+        """Report state, duration and accuracy of a training job."""
+        job = training_jobs.get(job_id)
+        if not job:
+            return {"message": "Training job not found"}, 404
+
+        return job.to_dict(), 200
 
 class PredictFoodResource(Resource):
     @jwt_required()
     def post(self):
         """Predict diet recommendation using saved user data."""
-        base_dir = os.path.abspath(os.path.dirname(__file__))  # ✅ Correct base path
-        model_path = os.path.join(base_dir, "../diet_model.pkl")  # ✅ Model path
-        features_path = os.path.join(base_dir, "../model_features.pkl")  # ✅ Feature names path
-
-        print(f"[INFO] Loading model from: {model_path}")
-
-        # ✅ Load trained model and feature names
+        # ✅ Loaded once per worker and hot-swapped after retraining
         try:
-            model = joblib.load(model_path)
-            feature_columns = joblib.load(features_path)
+            bundle = diet_registry.get()
         except FileNotFoundError:
             return {"message": "Model not trained yet"}, 400
+        model = bundle.model
 
         # ✅ Get logged-in user ID
         user_id = get_jwt_identity()
 
-        # ✅ Retrieve the latest diet data for the user
-        user_diet = DietData.query.filter_by(user_id=user_id).order_by(DietData.id.desc()).first()
+        # ✅ The user's current diet data is a primary-key read
+        user_diet = db.session.get(DietProfile, int(user_id))
         if not user_diet:
             return {"message": "No saved diet data found for this user"}, 404
 
-        # ✅ Convert retrieved data into DataFrame
-        df_input = pd.DataFrame([{
+        # ✅ Encode straight into the training feature columns (same values as get_dummies + reindex)
+        row = bundle.encoder.encode({
             "age": user_diet.age,
             "gender": user_diet.gender,
             "height": user_diet.height,
@@ -50,16 +57,81 @@ class PredictFoodResource(Resource):
             "activity_level": user_diet.activity_level,
             "goal": user_diet.goal,
             "dietary_preference": user_diet.dietary_preference
-        }])
+        })
 
-        # ✅ Convert categorical variables into dummy variables
-        df_input = pd.get_dummies(df_input)
+        # ✅ Same model and same features give the same vote, so reuse it
+        prediction = prediction_cache.get(bundle.version, row)
+        if prediction is None:
+            with metrics.timer("model_predict"):
+                prediction = str(model.predict(row.reshape(1, -1))[0])
+            prediction_cache.set(bundle.version, row, prediction)
 
-        # ✅ Ensure input has the same feature columns as training data
-        df_input = df_input.reindex(columns=feature_columns, fill_value=0)
+        return {"predicted_diet": prediction}, 200
 
-        # ✅ Make prediction
-        prediction = model.predict(df_input)[0]
 
-        return {"predicted_diet": prediction}, 200
 
+class PredictionCacheResource(Resource):
+    @jwt_required()
+    def get(self):
+        """Hit/miss counters of the prediction cache in this worker."""
+        return prediction_cache.stats(), 200
+
+
+# Ids per `IN (...)`: older SQLite builds allow 999 bound parameters per statement
+USER_ID_CHUNK_SIZE = 500
+
+
+class BatchPredictFoodResource(Resource):
+    @jwt_required()
+    def post(self):
+        """Predict diet recommendations for many users with one forest call.
+
+        Body: {"user_ids": [1, 2, ...]} or {"all": true}. Responds with one JSON
+        object per line: {"user_id", "predicted_diet", "confidence"}.
+        """
+        try:
+            bundle = diet_registry.get()
+        except FileNotFoundError:
+            return {"message": "Model not trained yet"}, 400
+
+        request_data = request.get_json(silent=True)
+        if not isinstance(request_data, dict):
+            return {"message": "Pass a list of user_ids or all=true"}, 400
+        user_ids = request_data.get("user_ids")
+        if not request_data.get("all"):
+            if not user_ids or not isinstance(user_ids, list) \
+                    or not all(isinstance(i, int) and not isinstance(i, bool) for i in user_ids):
+                return {"message": "user_ids must be a non-empty list of integers, or pass all=true"}, 400
+
+        from app.encoder import RAW_FEATURES
+
+        # ✅ Current diet data per user straight from the profile table
+        query = db.session.query(DietProfile.user_id, *[getattr(DietProfile, name) for name in RAW_FEATURES])
+        if request_data.get("all"):
+            rows = query.order_by(DietProfile.user_id).all()
+        else:
+            # Chunked so a long list stays under the database's bound-parameter limit
+            user_ids = sorted(set(user_ids))
+            rows = []
+            for start in range(0, len(user_ids), USER_ID_CHUNK_SIZE):
+                chunk = user_ids[start:start + USER_ID_CHUNK_SIZE]
+                rows += query.filter(DietProfile.user_id.in_(chunk)).order_by(DietProfile.user_id).all()
+        if not rows:
+            return {"message": "No saved diet data found for these users"}, 404
+
+        # ✅ One matrix, one predict_proba pass; predict() is argmax over the same votes
+        X = bundle.encoder.transform(row._mapping for row in rows)
+        with metrics.timer("model_predict_batch"):
+            proba = bundle.model.predict_proba(X)
+        best = proba.argmax(axis=1)
+        classes = bundle.model.classes_
+
+        def generate():
+            for row, i, p in zip(rows, best, proba):
+                yield json.dumps({
+                    "user_id": row.user_id,
+                    "predicted_diet": str(classes[i]),
+                    "confidence": round(float(p[i]), 4),
+                }) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
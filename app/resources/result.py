@@ -1,52 +1,133 @@
-from flask import jsonify, request
+import json
+from datetime import timezone
+from itertools import groupby
+from typing import Optional
+from flask import Response, jsonify, request, stream_with_context
 from flask_restful import Resource
+from sqlalchemy import func
+from werkzeug.http import http_date, is_resource_modified, quote_etag
+from app import db
 from app.models import Users, DietData
 from app.schemas.user import UserSchema, DietDataSchema
+from app.serialization import RowDumper
 
-user_schema = UserSchema(many=True)
+user_schema = UserSchema()
+diet_schema = DietDataSchema()
 diet_data_schema = DietDataSchema(many=True)
+user_dumper = RowDumper(user_schema, Users)
+diet_dumper = RowDumper(diet_schema, DietData)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
 
 
 class AllUsersWithDietData(Resource):
     def get(self):
-        # Fetch all users
-        users = Users.query.all()
-        users_data = user_schema.dump(users)
+        """Returns users with their diet data, one keyset page at a time.
+
+        Query parameters: `after` (last user id of the previous page), `limit`
+        (page size, capped at MAX_PAGE_SIZE) and `format=ndjson`, which streams
+        one user per line and lets `limit=0` stream every user after `after`.
+        The next page's cursor is sent in the X-Next-Cursor header.
+        """
+        try:
+            after = int(request.args.get("after", 0))
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return {"message": "after and limit must be integers"}, 400
+
+        if request.args.get("format") == "ndjson":
+            groups = iter_user_diet_groups(after, min(limit, MAX_PAGE_SIZE) if limit > 0 else None)
+            lines = (json.dumps(group, default=str) + "\n" for group in groups)
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+        final_output = list(iter_user_diet_groups(after, limit))
+
+        response = jsonify(final_output)
+        if len(final_output) == limit:
+            response.headers["X-Next-Cursor"] = str(final_output[-1]["user_info"]["id"])
+        return response
+
+
+def iter_user_diet_groups(after: int, limit: Optional[int]):
+    """Yield {"user_info", "diet_data"} for users with id > `after`, in id order.
+
+    One query: the page of user ids joined to users and outer-joined to
+    diet_data, ordered so each user's rows arrive together. Only the columns
+    the schemas dump are selected, and no ORM objects are built, so no
+    relationship can lazy-load behind our back.
+    """
+    page = db.session.query(Users.id).filter(Users.id > after).order_by(Users.id)
+    if limit is not None:
+        page = page.limit(limit)
+    page = page.subquery()
+
+    columns = user_dumper.columns + [column.label(f"diet_{column.key}") for column in diet_dumper.columns]
+    rows = (
+        db.session.query(*columns)
+        .join(page, Users.id == page.c.id)
+        .outerjoin(DietData, DietData.user_id == Users.id)
+        .order_by(Users.id, DietData.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
 
-        # Fetch all diet data
-        diet_data = DietData.query.all()
-        diet_data_records = diet_data_schema.dump(diet_data)
+    n_user = len(user_dumper.columns)
+    user_id_at = user_dumper.keys.index("id")
+    diet_id_at = n_user + diet_dumper.keys.index("id")
+    for _, user_rows in groupby(rows, key=lambda row: row[user_id_at]):
+        user_rows = list(user_rows)
+        yield {
+            "user_info": user_dumper.dump(user_rows[0][:n_user]),
+            # An outer-joined user without diet rows comes back with a NULL diet id
+            "diet_data": [diet_dumper.dump(row[n_user:]) for row in user_rows if row[diet_id_at] is not None],
+        }
 
-        # Organize data per user
-        user_diet_mapping = {}
-        for user in users_data:
-            user_id = user["id"]
-            user_diet_mapping[user_id] = {
-                "user_info": user,
-                "diet_data": [],
-            }
 
-        for diet in diet_data_records:
-            user_id = diet["user_id"]
-            if user_id in user_diet_mapping:
-                user_diet_mapping[user_id]["diet_data"].append(diet)
+def dump_user_diets(user_id) -> list:
+    """A user's diet rows as `diet_data_schema.dump` would give them, from one column-projected query."""
+    rows = db.session.query(*diet_dumper.columns).filter(DietData.user_id == user_id).order_by(DietData.id)
+    return diet_dumper.dump_many(rows)
 
-        # Convert mapping to list
-        final_output = list(user_diet_mapping.values())
 
-        return jsonify(final_output)
+def user_diets_response(user_id):
+    """A user's diet rows with ETag and Last-Modified, or a bodiless 304 when the client's copy is current.
+
+    The validators come from one aggregate over the user's rows. diet_data
+    is append-only history, so the row count and highest id change with
+    every save (or delete); updated_at supplies Last-Modified. A 304 skips
+    the row query and serialization entirely. The 200 body is left to
+    Flask-RESTful, so it keeps the bytes these endpoints always returned.
+    """
+    count, last_id, updated_at = (
+        db.session.query(func.count(DietData.id), func.max(DietData.id), func.max(DietData.updated_at))
+        .filter(DietData.user_id == user_id)
+        .one()
+    )
+    if not count:
+        return {"message": "No diet records found for this user"}, 404
+
+    etag = f"diet-{user_id}-{count}-{last_id}"
+    last_modified = updated_at.astimezone(timezone.utc) if updated_at else None  # Stored as naive local time
+
+    headers = {
+        "ETag": quote_etag(etag, weak=True),  # Weak: the bytes differ between gzip, brotli and identity
+        "Cache-Control": "private, no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return Response(status=304, headers=headers)
+    return {"diet_data": dump_user_diets(user_id)}, 200, headers
 
 
 class UserDietByID(Resource):
     def get(self, user_id):
         """Returns a specific user's diet data based on user ID in the path."""
-        # Fetch diet data for the specified user
-        user_diets = DietData.query.filter_by(user_id=user_id).all()
-        
-        if not user_diets:
-            return {"message": "No diet records found for this user"}, 404
-
-        return {"diet_data": diet_data_schema.dump(user_diets)}, 200
+        # Fetch diet data for the specified user (304 if unchanged since the client's copy)
+        return user_diets_response(user_id)
 
 
 class UserDietByQuery(Resource):
@@ -57,10 +138,5 @@ class UserDietByQuery(Resource):
         if not user_id:
             return {"message": "User ID is required as a query parameter"}, 400
         
-        # Fetch diet data for the specified user
-        user_diets = DietData.query.filter_by(user_id=user_id).all()
-        
-        if not user_diets:
-            return {"message": "No diet records found for this user"}, 404
-
-        return {"diet_data": diet_data_schema.dump(user_diets)}, 200
+        # Fetch diet data for the specified user (304 if unchanged since the client's copy)
+        return user_diets_response(user_id)
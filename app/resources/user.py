@@ -1,21 +1,55 @@
 from datetime import datetime, timedelta, timezone
+import csv
 import json
-from flask import request
+from itertools import islice
+from flask import current_app, request
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     get_jwt,
     get_jwt_identity,
     jwt_required,
-    decode_token
 )
 from flask_restful import Resource
-from app.models import Users, DietData
+from marshmallow import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app import db
+from app.blocklist import revoked_tokens
+from app.models import Users, DietData, DietProfile, PROFILE_FIELDS
+from app.resources.result import user_diets_response
+from app.security import HasherBusy
 from app.schemas.user import UserSchema, DietDataSchema
 
 user_schema = UserSchema()
 diet_data_schema = DietDataSchema()
-diet_data_list_schema = DietDataSchema(many=True)
+diet_data_bulk_schema = DietDataSchema(many=True, load_instance=False)  # Plain dicts for core INSERTs
+diet_data_fields_schema = DietDataSchema(load_instance=False, partial=True)
+
+
+def access_token_expiration(issued_at: datetime):
+    """Expiry of an access token issued at `issued_at`, as shown to clients, or None if it never expires.
+
+    Worked out from JWT_ACCESS_TOKEN_EXPIRES instead of decoding the token
+    we just signed, so issuing costs an HMAC signature and nothing else.
+    """
+    expires_delta = current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+    if not expires_delta:
+        return None  # JWT_ACCESS_TOKEN_EXPIRES = False: the token never expires
+    # PyJWT truncates exp to whole seconds
+    return (issued_at + expires_delta).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def issue_tokens(user: Users) -> dict:
+    """Access and refresh tokens for `user`, with the access token's expiry worked out from config."""
+    identity = str(user.id)  # ✅ Convert user.id to a string
+    issued_at = datetime.now(timezone.utc)
+
+    access_token = create_access_token(identity=identity, fresh=True)
+    refresh_token = create_refresh_token(identity)
+
+    return {"access_token": access_token, "refresh_token": refresh_token,
+            "token_expiration_time": access_token_expiration(issued_at)}
 
 class UserRegister(Resource):
     @classmethod
@@ -29,10 +63,17 @@ class UserRegister(Resource):
             return {"message": "A user with that username already exists"}, 400
 
         # Set password hash
-        user.set_password(user.password)
+        try:
+            user.set_password(user.password)
+        except HasherBusy as e:
+            return {"message": str(e)}, 503, {"Retry-After": "1"}
 
-        # Save user to database
-        user.save_to_db()
+        # Save user to database; the unique username index catches a concurrent registration
+        try:
+            user.save_to_db()
+        except IntegrityError:
+            db.session.rollback()
+            return {"message": "A user with that username already exists"}, 400
 
         return {"message": "User created successfully."}, 201
     
@@ -43,56 +84,91 @@ class UserLogin(Resource):
         
         user = Users.find_by_username(user_data.get("username"))
 
-        if not user or not user.check_password(user_data.get("password")):
-            return {"message": "Invalid credentials"}, 401
+        try:
+            if not user or not user.check_password(user_data.get("password")):
+                return {"message": "Invalid credentials"}, 401
 
-        # ✅ Convert user.id to a string
-        access_token = create_access_token(identity=str(user.id), fresh=True)
-        refresh_token = create_refresh_token(str(user.id))
+            # ✅ Upgrade hashes made with old parameters while we have the plain password
+            if user.needs_rehash():
+                user.set_password(user_data.get("password"))
+                user.save_to_db()
+        except HasherBusy as e:
+            return {"message": str(e)}, 503, {"Retry-After": "1"}
 
-        # ✅ Decode the access token to get expiration time
-        decoded_token = decode_token(access_token)
-        expiration_timestamp = decoded_token["exp"]
-        expiration_time = datetime.fromtimestamp(expiration_timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+        tokens = issue_tokens(user)
 
         return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
+            "access_token": tokens["access_token"],
+            "refresh_token": tokens["refresh_token"],
             "username": user.username,
             "first_name": user.first_name,
             "last_name": user.last_name,
             "user_id": user.id,
-            "token_expiration_time": expiration_time  # ✅ Return expiration time
+            "token_expiration_time": tokens["token_expiration_time"]  # ✅ Return expiration time
         }, 200
-    
 
-class DietDataResource(Resource):
-    @jwt_required()
+
+class TokenRefresh(Resource):
+    @jwt_required(refresh=True)
     def post(self):
-        """Creates or updates a user's diet data."""
-        user_id = get_jwt_identity()  # Get logged-in user ID
+        """Issues a new (non-fresh) access token from a refresh token."""
+        identity = get_jwt_identity()
+        issued_at = datetime.now(timezone.utc)
 
-        # Deserialize request data using Marshmallow
-        request_data = request.get_json()
+        access_token = create_access_token(identity=identity, fresh=False)
 
-        # Check if diet data for the user already exists
-        existing_diet_data = DietData.query.filter_by(user_id=user_id).first()
+        return {"access_token": access_token, "token_expiration_time": access_token_expiration(issued_at)}, 200
 
-        if existing_diet_data:
-            # Use Marshmallow to update existing data with new request values
-            updated_diet_data = diet_data_schema.load(request_data, instance=existing_diet_data, partial=True)
 
-            updated_diet_data.save_to_db()
-            return {"message": "Diet data updated successfully", "diet_id": updated_diet_data.id}, 200
+class UserLogout(Resource):
+    @jwt_required(verify_type=False)
+    def post(self):
+        """Revokes the token sent with the request (call once with each of the access and refresh tokens)."""
+        token = get_jwt()
+        revoked_tokens.revoke(token)
 
-        # Create new diet data entry if it does not exist
-        # request_data["user_id"] = user_id  # Ensure user_id is set
-        new_diet_data = diet_data_schema.load(request_data)
-        new_diet_data.user_id = user_id
+        return {"message": f"{token['type'].capitalize()} token revoked"}, 200
 
-        new_diet_data.save_to_db()
 
-        return {"message": "Diet data saved successfully", "diet_id": new_diet_data.id}, 201
+class DietDataResource(Resource):
+    @jwt_required()
+    def post(self):
+        """Creates or updates a user's diet data.
+
+        A full record upserts the user's profile in one statement (no read
+        first, so concurrent posts cannot create duplicates); a partial one
+        updates the fields it sends on the existing profile. The resulting
+        values, plus any `recommended_diet` label, are appended to the
+        diet_data history. Both writes commit together.
+        """
+        user_id = int(get_jwt_identity())  # Get logged-in user ID
+
+        # Deserialize request data using Marshmallow (only the sent fields)
+        request_data = diet_data_fields_schema.load(request.get_json())
+        fields = {name: request_data[name] for name in PROFILE_FIELDS if name in request_data}
+
+        now = datetime.now()
+        try:
+            if len(fields) == len(PROFILE_FIELDS):
+                profile = DietProfile.upsert(user_id, fields, now)
+            else:
+                profile = DietProfile.update_fields(user_id, fields, now)
+                if profile is None:
+                    db.session.rollback()
+                    return {"message": "All diet data fields are required for the first entry"}, 400
+
+            history = DietData(user_id=user_id, created_at=now, updated_at=now,
+                               recommended_diet=request_data.get("recommended_diet"),
+                               **{name: getattr(profile, name) for name in PROFILE_FIELDS})
+            db.session.add(history)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            return {"message": f"Could not save diet data: {getattr(e, 'orig', None) or e}"}, 400
+
+        if profile.created_at == profile.updated_at:  # Only an insert sets both
+            return {"message": "Diet data saved successfully", "diet_id": history.id}, 201
+        return {"message": "Diet data updated successfully", "diet_id": history.id}, 200
     
 
 # class DietDataResource(Resource):
@@ -113,11 +189,135 @@ class DietDataResource(Resource):
     def get(self):
         user_id = get_jwt_identity()  # Get logged-in user ID
 
-        # Retrieve user's diet data
-        user_diets = DietData.query.filter_by(user_id=user_id).all()
+        # Retrieve user's diet data (304 if unchanged since the client's copy)
+        return user_diets_response(user_id)
+
+
+def _decode_lines(stream):
+    """(line, error) per non-blank line of a binary stream; a line that is not UTF-8 comes back as an error."""
+    for raw in stream:
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            yield None, f"Not valid UTF-8: {e}"
+            continue
+        if line.strip():
+            yield line, None
+
+
+def _iter_bulk_rows():
+    """(row, error) per record of a bulk upload, read lazily: JSON array, NDJSON or CSV (upload or body).
+
+    NDJSON and CSV are read one record per line, so a line that cannot be
+    decoded or parsed is reported as that row's error and the rest still load.
+    Empty CSV cells become None, like a missing JSON key.
+    """
+    upload = request.files.get("file")
+    if upload is not None or request.mimetype == "text/csv":
+        lines = _decode_lines(upload.stream if upload is not None else request.stream)
+        header_line, error = next(lines, (None, None))
+        if header_line is None:
+            raise ValueError(error or "CSV upload has no header row")
+        header = next(csv.reader([header_line]))
+        for line, error in lines:
+            if error:
+                yield None, error
+                continue
+            try:
+                values = next(csv.reader([line]))
+            except csv.Error as e:
+                yield None, f"Invalid CSV: {e}"
+                continue
+            if len(values) != len(header):
+                yield None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield {name: value if value != "" else None for name, value in zip(header, values)}, None
+    elif request.mimetype == "application/x-ndjson":
+        for line, error in _decode_lines(request.stream):
+            if error:
+                yield None, error
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError as e:
+                yield None, f"Invalid JSON: {e}"
+    else:
+        rows = request.get_json()
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of diet records")
+        for row in rows:
+            yield row, None
+
+
+class DietDataBulkResource(Resource):
+    @jwt_required()
+    def post(self):
+        """Imports many of the caller's diet records in one request.
+
+        Rows are validated a batch at a time with one `DietDataSchema(many=True)`
+        load, and written with one multi-row INSERT and one commit per batch
+        (DIET_BULK_BATCH_SIZE), which also upserts the caller's diet_profile
+        to their last row. Every row belongs to the caller; a row naming
+        another user_id is rejected. Unreadable and invalid rows are reported
+        by index and skipped; the rest are saved.
+        """
+        user_id = get_jwt_identity()
+        batch_size = current_app.config["DIET_BULK_BATCH_SIZE"]
+
+        rows = _iter_bulk_rows()
+        inserted, errors, offset = 0, [], 0
+        try:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+
+                readable = []
+                for i, (row, error) in enumerate(batch, offset):
+                    if error is None and isinstance(row, dict):
+                        if row.get("user_id") is not None and str(row["user_id"]) != str(user_id):
+                            error = "Rows can only be imported for the logged-in user."
+                        else:
+                            row["user_id"] = user_id
+                    if error is None:
+                        readable.append((i, row))
+                    else:
+                        errors.append({"row": i, "errors": {"_row": [error]}})
+
+                batch_inserted, batch_errors = self._ingest_batch(readable, offset, len(batch))
+                inserted += batch_inserted
+                errors.extend(batch_errors)
+                offset += len(batch)
+        except ValueError as e:
+            # Only raised before the first row: no JSON array, or no CSV header
+            return {"message": f"Could not read upload: {e}", "inserted": inserted}, 400
 
-        if not user_diets:
-            return {"message": "No diet records found for this user"}, 404
+        errors.sort(key=lambda error: error.get("row", error.get("rows", [0])[0]))
+        status = 201 if inserted or not errors else 400
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}, status
 
-        return {"diet_data": diet_data_list_schema.dump(user_diets)}, 200
+    @staticmethod
+    def _ingest_batch(rows, offset, batch_length):
+        """Validate and write (index, row) pairs of one batch. Returns (inserted, errors)."""
+        try:
+            records, messages = diet_data_bulk_schema.load([row for _, row in rows]), {}
+        except ValidationError as e:
+            # With many=True, valid_data keeps one entry per input row, so positions line up
+            records, messages = e.valid_data, e.messages
+        errors = [{"row": rows[position][0], "errors": messages[position]} for position in sorted(messages)]
+        # Every row carries the caller's user_id, which the JWT already vouches for
+        valid = [record for position, record in enumerate(records) if position not in messages]
 
+        if not valid:
+            return 0, errors
+        # Later rows win: each user's profile becomes their last row in the batch
+        profiles = {record["user_id"]: {name: record[name] for name in ("user_id", *PROFILE_FIELDS)} for record in valid}
+        try:
+            db.session.execute(insert(DietData), valid)
+            DietProfile.upsert_many(list(profiles.values()), datetime.now())
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            errors.append({"rows": [offset, offset + batch_length - 1], "errors": {"_batch": [str(getattr(e, "orig", None) or e)]}})
+            return 0, errors
+        return len(valid), errors
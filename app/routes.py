@@ -1,28 +1,30 @@
+import logging
 import os
-import pickle
-import subprocess
-import time
-import requests
-from threading import Thread
-
-import numpy as np
-import pandas as pd  
+
 from flask import request
-from sklearn.linear_model import Lasso
-from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
-from sklearn.model_selection import train_test_split
 
 from flask import jsonify
-from marshmallow import ValidationError
-
-from app import app, jwt, api
 
-from app.resources.user import UserRegister, UserLogin, DietDataResource
-from app.resources.food import TrainModelResource, PredictFoodResource
+from app import app, db, jwt, api
+from app.cache import prediction_cache
+from app.db_profile import pool_metrics
+from app.metrics import metrics
+from app.ad_model import AD_DATA_PATH, AD_FEATURES, train_ad_model
+from app.deploy import deployments, verify_github_signature
+from app.jobs import TrainingJobQueue
+from app.registry import ad_registry
+
+from app.resources.user import UserRegister, UserLogin, UserLogout, TokenRefresh, DietDataResource, DietDataBulkResource
+from app.resources.food import TrainModelResource, TrainModelJobResource, PredictFoodResource, BatchPredictFoodResource, PredictionCacheResource
 from app.resources.result import AllUsersWithDietData, UserDietByID, UserDietByQuery
 
+# ML (numpy, pandas, sklearn) and admin tooling (requests, subprocess) imports live
+# inside the handlers that use them, so importing the app stays fast; see app/warmup.py
+
+logger = logging.getLogger(__name__)
 
-os.chdir(os.path.dirname(__file__))
+# Lasso's coordinate descent releases the GIL, so a thread is enough and lets the job report progress
+ad_training_jobs = TrainingJobQueue("ad_model", train_ad_model, on_success=ad_registry.refresh, use_processes=False)
     
 # Route to endpoint /
 @app.route("/", methods=["GET"])
@@ -30,16 +32,36 @@ def hello():
     # return "Welcome to the API that predicts revenues from advertising!"
     return "The webhook is working! happy yayyyy :) "
 
+@app.route("/metrics/db_pool", methods=["GET"])
+def db_pool_metrics():
+    """Connection pool checkout wait times and exhaustion count for this worker."""
+    return jsonify(pool_metrics.snapshot(db.engine.pool))
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus text format: request latency, SQL per request, model load/predict, pool and cache."""
+    extra = {f"db_pool_{name}": value for name, value in pool_metrics.snapshot(db.engine.pool).items()}
+    cache_stats = prediction_cache.stats()
+    extra["prediction_cache_hits"] = cache_stats["hits"]
+    extra["prediction_cache_misses"] = cache_stats["misses"]
+    return metrics.render(extra), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
 # user info
 
 api.add_resource(UserRegister, "/register")
 api.add_resource(UserLogin, "/login")
+api.add_resource(UserLogout, "/logout")
+api.add_resource(TokenRefresh, "/refresh")
 api.add_resource(DietDataResource, "/diet")  # Protected route
+api.add_resource(DietDataBulkResource, "/diet/bulk")  # Protected route
 
 # food prediciton
 
 api.add_resource(TrainModelResource, "/train_model")
+api.add_resource(TrainModelJobResource, "/train_model/<string:job_id>")
 api.add_resource(PredictFoodResource, "/predict_food")
+api.add_resource(BatchPredictFoodResource, "/predict_food/batch")
+api.add_resource(PredictionCacheResource, "/predict_food/cache")
 
 # return result
 api.add_resource(AllUsersWithDietData, "/users_diet_data")
@@ -52,23 +74,67 @@ api.add_resource(UserDietByQuery, "/user_diet_query")
 """
 The petition would be:
 http://x.x.x.x:5000/api/v1/predict?radio=15&newspaper=60&tv=80
+
+or, for many rows at once, a POST with either
+    JSON: {"rows": [[tv, radio, newspaper], ...]} or [{"tv": .., "radio": .., "newspaper": ..}, ...]
+    CSV:  a "file" upload or text/csv body with tv, radio and newspaper columns
 """
 
 
-@app.route("/api/v1/predict", methods=["GET"])
+def _ad_rows_from_request():
+    """The (n, 3) float matrix of tv, radio, newspaper rows sent with a POST."""
+    import numpy as np
+    import pandas as pd
+
+    upload = request.files.get("file")
+    if upload is not None or request.mimetype == "text/csv":
+        frame = pd.read_csv(upload.stream if upload is not None else request.stream)
+        frame.columns = [column.strip().lower() for column in frame.columns]
+        missing = [name for name in AD_FEATURES if name not in frame.columns]
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+        return frame[list(AD_FEATURES)].to_numpy(dtype=np.float64)
+
+    payload = request.get_json(silent=True)
+    rows = payload.get("rows") if isinstance(payload, dict) else payload
+    if not rows:
+        raise ValueError("Send rows as JSON or a CSV file")
+    if isinstance(rows[0], dict):
+        rows = [[row[name] for name in AD_FEATURES] for row in rows]
+
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(AD_FEATURES):
+        raise ValueError(f"Each row needs {len(AD_FEATURES)} values: {', '.join(AD_FEATURES)}")
+    return X
+
+
+@app.route("/api/v1/predict", methods=["GET", "POST"])
 def predict():
-    model = pickle.load(open("ad_model.pkl", "rb"))
+    try:
+        model = ad_registry.get().model
+    except FileNotFoundError:
+        return {"message": "Ad model not trained yet"}, 400
+
+    if request.method == "POST":
+        try:
+            X = _ad_rows_from_request()
+        except (ValueError, KeyError, TypeError) as e:
+            return {"message": f"Invalid input: {e}"}, 400
+
+        # ✅ One vectorized call for every row
+        return {"predictions": model.predict(X).tolist()}
+
     tv = request.args.get("tv", None)
     radio = request.args.get("radio", None)
     newspaper = request.args.get("newspaper", None)
 
-    print(tv, radio, newspaper)
-    print(type(tv))
+    logger.debug("Ad revenue prediction requested", extra={"tv": tv, "radio": radio, "newspaper": newspaper})
 
     if tv is None or radio is None or newspaper is None:
         return "Args empty, the data is not enough to predict!"
     else:
-        prediction = model.predict([[float(tv), float(radio), float(newspaper)]])
+        import numpy as np
+        prediction = model.predict(np.array([[float(tv), float(radio), float(newspaper)]]))
 
     return {"predictions": prediction[0]}
 
@@ -81,23 +147,29 @@ http://x.x.x.x:5000/api/v1/retrain
 
 @app.route("/api/v1/retrain", methods=["GET"])
 def retrain():
-    if os.path.exists("data/Advertising_new.csv"):
-        data = pd.read_csv("data/Advertising_new.csv")
+    """Start retraining in the background; poll /api/v1/retrain/<job_id> for progress and metrics.
 
-        X_train, X_test, y_train, y_test = train_test_split(
-            data.drop(columns=["sales"]), data["sales"], test_size=0.20, random_state=42
-        )
+    ?warm_start=true starts the solver from the current model's coefficients.
+    """
+    if os.path.exists(AD_DATA_PATH):
+        warm_start = request.args.get("warm_start", "false").lower() == "true"
+        job, created = ad_training_jobs.submit(warm_start=warm_start)
+        message = "Model retraining started" if created else "Model retraining already in progress"
 
-        model = Lasso(alpha=6000)
-        model.fit(X_train, y_train)
-        rmse = np.sqrt(mean_squared_error(y_test, model.predict(X_test)))
-        mape = mean_absolute_percentage_error(y_test, model.predict(X_test))
-        model.fit(data.drop(columns=["sales"]), data["sales"])
-        pickle.dump(model, open("ad_model.pkl", "wb"))
-
-        return f"Model retrained. New evaluation metric RMSE: {str(rmse)}, MAPE: {str(mape)}"
+        return {"message": message, "job_id": job.id, "status_url": f"/api/v1/retrain/{job.id}"}, 202
     else:
         return "<h2>New data for retrain NOT FOUND. Nothing done!</h2>"
+
+
+@app.route("/api/v1/retrain/<string:job_id>", methods=["GET"])
+def retrain_status(job_id):
+    """State, progress, duration and RMSE/MAPE of an ad model retraining job."""
+    job = ad_training_jobs.get(job_id)
+    if not job:
+        return {"message": "Retraining job not found"}, 404
+
+    return job.to_dict(), 200
+
     
 # Repository and server paths on PythonAnywhere
 path_repo = "/home/kollie/flask-project/ad-backend-flask-webhook"
@@ -106,6 +178,13 @@ BASE_URL = "https://kollie.pythonanywhere.com"  # Update with your actual deploy
 
 HEADERS = {"Content-Type": "application/json"}
 
+
+def _local_post(path, headers=HEADERS, **kwargs):
+    """POST to this server, for the test-data tooling endpoints below."""
+    import requests
+
+    return requests.post(f"http://127.0.0.1{path}", headers=headers, **kwargs)
+
 # Test users
 test_users = [
     {"first_name": "John", "last_name": "Doe", "username": "johndoe", "password": "password123"},
@@ -161,101 +240,102 @@ test_diet_data = {
 #     except subprocess.CalledProcessError as e:
 #         print(f"[ERROR] Migration failed: {e}")
 
-def run_migrations():
+def run_migrations(repo_path=path_repo):
     """Run Flask database migrations only if needed."""
-    print("[INFO] Running database migrations...")
+    import subprocess
 
-    os.environ["FLASK_APP"] = "/home/kollie/flask-project/ad-backend-flask-webhook/main.py"
+    logger.info("Running database migrations...")
+
+    # Passed to the subprocesses only, so concurrent requests keep their environment and cwd
+    env = {**os.environ, "FLASK_APP": os.path.join(repo_path, "main.py")}
 
     try:
-        from main import application  # Import inside function to avoid circular imports
-        from app import db
-
-        with application.app_context():
-            migration_path = os.path.join(os.getcwd(), "app/migrations")
-            if not os.path.exists(migration_path) or not os.listdir(migration_path):
-                print("[INFO] Initializing migrations...")
-                subprocess.run(["flask", "db", "init"], check=True)
-            else:
-                print("[INFO] Migrations already initialized. Skipping 'flask db init'.")
-
-            # Check if there are any new model changes before running migration
-            result = subprocess.run(["flask", "db", "migrate", "-m", "Auto migration"], capture_output=True, text=True)
-            if "No changes detected" in result.stdout:
-                print("[INFO] No changes detected in models. Skipping 'flask db migrate'.")
-            else:
-                print("[INFO] Running migrations...")
-                subprocess.run(["flask", "db", "upgrade"], check=True)
-                print("[SUCCESS] Database migrations completed.")
+        migration_path = os.path.join(repo_path, "app/migrations")
+        if not os.path.exists(migration_path) or not os.listdir(migration_path):
+            logger.info("Initializing migrations...")
+            subprocess.run(["flask", "db", "init"], check=True, cwd=repo_path, env=env)
+        else:
+            logger.info("Migrations already initialized. Skipping 'flask db init'.")
+
+        # Check if there are any new model changes before running migration
+        result = subprocess.run(["flask", "db", "migrate", "-m", "Auto migration"], capture_output=True, text=True,
+                                cwd=repo_path, env=env)
+        if "No changes detected" in result.stdout:
+            logger.info("No changes detected in models. Skipping 'flask db migrate'.")
+        else:
+            logger.info("Running migrations...")
+            subprocess.run(["flask", "db", "upgrade"], check=True, cwd=repo_path, env=env)
+            logger.info("Database migrations completed.")
 
     except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Migration failed: {e}")
+        logger.error(f"Migration failed: {e}")
+        raise
 
 
 
 def register_users():
-    print("[INFO] Registering test users...")
+    logger.info("Registering test users...")
     for user in test_users:
-        response = requests.post("http://127.0.0.1/register", json=user, headers=HEADERS)
+        response = _local_post("/register", json=user)
         if response.status_code == 201:
-            print(f"[SUCCESS] User {user['username']} registered.")
+            logger.info(f"User {user['username']} registered.")
         else:
-            print(f"[ERROR] User {user['username']} registration failed: {response.json()}")
+            logger.error(f"User {user['username']} registration failed: {response.json()}")
 
 
 
 def login_users():
-    print("[INFO] Logging in users...")
+    logger.info("Logging in users...")
     user_tokens = {}
     for user in test_users:
         login_data = {"username": user["username"], "password": user["password"]}
-        response = requests.post("http://127.0.0.1/login", json=login_data, headers=HEADERS)
+        response = _local_post("/login", json=login_data)
         if response.status_code == 200:
             token = response.json()["access_token"]
             user_tokens[user["username"]] = token
-            print(f"[SUCCESS] User {user['username']} logged in.")
+            logger.info(f"User {user['username']} logged in.")
         else:
-            print(f"[ERROR] User {user['username']} login failed: {response.json()}")
+            logger.error(f"User {user['username']} login failed: {response.json()}")
     return user_tokens
 
 
 
 def pass_user_data(user_tokens):
-    print("[INFO] Passing diet data for users...")
+    logger.info("Passing diet data for users...")
     for username, token in user_tokens.items():
         auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
-        response = requests.post("http://127.0.0.1/diet", json=test_diet_data, headers=auth_headers)
+        response = _local_post("/diet", json=test_diet_data, headers=auth_headers)
         if response.status_code == 201:
-            print(f"[SUCCESS] Diet data saved for {username}.")
+            logger.info(f"Diet data saved for {username}.")
         else:
-            print(f"[ERROR] Saving diet data for {username} failed: {response.json()}")
+            logger.error(f"Saving diet data for {username} failed: {response.json()}")
 
 
 
 def train_model(user_tokens):
-    print("[INFO] Training the model...")
+    logger.info("Training the model...")
     # Use the first user's token to train the model
     token = list(user_tokens.values())[0]
     auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
-    response = requests.post("http://127.0.0.1/train_model", headers=auth_headers)
+    response = _local_post("/train_model", headers=auth_headers)
 
-    if response.status_code == 200:
-        print("[SUCCESS] Model trained successfully.")
+    if response.status_code == 202:
+        logger.info(f"Model training started: {response.json()['job_id']}")
     else:
-        print("[ERROR] Model training failed:", response.json())
+        logger.error(f"Model training failed: {response.json()}")
 
 
 def test_prediction(user_tokens):
-    print("[INFO] Running diet prediction...")
+    logger.info("Running diet prediction...")
     for username, token in user_tokens.items():
         auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
-        response = requests.post("http://127.0.0.1/predict_food", json=test_diet_data, headers=auth_headers)
+        response = _local_post("/predict_food", json=test_diet_data, headers=auth_headers)
 
         if response.status_code == 200:
             prediction = response.json()
-            print(f"[SUCCESS] Diet prediction for {username}: {prediction}")
+            logger.info(f"Diet prediction for {username}: {prediction}")
         else:
-            print(f"[ERROR] Diet prediction for {username} failed: {response.json()}")
+            logger.error(f"Diet prediction for {username} failed: {response.json()}")
 
 
 # @app.route("/webhook", methods=["POST"])
@@ -380,122 +460,130 @@ def test_prediction(user_tokens):
 
 @app.route("/webhook", methods=["POST"])
 def webhook():
-    """GitHub Webhook - Only Runs Migrations"""
-    print("[INFO] Webhook triggered.")
-    path_repo = "/home/kollie/flask-project/ad-backend-flask-webhook"
-    servidor_web = "/var/www/kollie_pythonanywhere_com_wsgi.py"
+    """GitHub Webhook - queues git pull, migrations and a web server reload, then returns 202."""
+    logger.info("Webhook triggered.")
+
+    # Deploying runs code from the repository, so unsigned payloads are never accepted
+    secret = app.config.get("WEBHOOK_SECRET")
+    if not secret:
+        logger.error("Webhook rejected: WEBHOOK_SECRET is not configured")
+        return {"message": "Webhook is not configured"}, 403
+    if not verify_github_signature(secret, request.get_data(), request.headers.get("X-Hub-Signature-256")):
+        return {"message": "Invalid webhook signature"}, 401
 
     if request.is_json:
         payload = request.json
         if "repository" in payload:
+            import subprocess
+
             repo_name = payload["repository"]["name"]
-            clone_url = payload["repository"]["clone_url"]
 
-            try:
-                os.chdir(path_repo)
-            except FileNotFoundError:
-                print("[ERROR] Repository path not found!")
+            if not os.path.isdir(path_repo):
+                logger.error("Repository path not found!")
                 return {"message": "The directory of the repository does not exist!"}, 404
 
-            try:
-                print("[INFO] Running Git Pull...")
-                subprocess.run(["git", "pull", clone_url], check=True)
-                print("[SUCCESS] Git Pull Completed.")
-
-                from app import app
-                with app.app_context():
-                    print("[INFO] Running Migrations...")
-                    run_migrations()  # ✅ Only running migrations!
-
-                subprocess.run(["touch", servidor_web], check=True)
-                print("[SUCCESS] Web server reloaded.")
+            steps = [
+                # Pull from the checkout's own remote, never from a URL named in the payload
+                ("git_pull", lambda: subprocess.run(["git", "pull"], check=True, cwd=path_repo, timeout=300)),
+                ("migrations", lambda: run_migrations(path_repo)),  # ✅ Only running migrations!
+                ("reload", lambda: subprocess.run(["touch", servidor_web], check=True)),
+            ]
+            # The same push delivered twice (GitHub retries) deploys once; without an id, always deploy
+            key = payload.get("after") or request.headers.get("X-GitHub-Delivery")
+            deployment, created = deployments.submit(key, steps)
+
+            message = f"Deployment queued for {repo_name}." if created else f"Deployment for {repo_name} already queued."
+            return {"message": message, "deploy_id": deployment.id, "status_url": f"/webhook/{deployment.id}"}, 202
+    return {"message": "Invalid webhook payload"}, 400
 
-                return {"message": f"Webhook processed for {repo_name}, migrations completed."}, 200
 
-            except subprocess.CalledProcessError as e:
-                print(f"[ERROR] Git pull failed: {str(e)}")
-                return {"message": f"Git pull error: {repo_name}"}, 500
-    return {"message": "Invalid webhook payload"}, 400
+@app.route("/webhook/<string:deploy_id>", methods=["GET"])
+def webhook_status(deploy_id):
+    """State and per-step timings of a queued deployment."""
+    deployment = deployments.get(deploy_id)
+    if not deployment:
+        return {"message": "Deployment not found"}, 404
+    return deployment.to_dict(), 200
 
 
 @app.route("/run-migrations", methods=["GET"])
 def run_migrations_endpoint():
     """Manually run database migrations inside Flask app context."""
-    print("[INFO] Running Migrations...")
+    logger.info("Running Migrations...")
     try:
         with app.app_context():
             run_migrations()
         return jsonify({"message": "Migrations completed successfully."}), 200
     except Exception as e:
-        print(f"[ERROR] Migration failed: {str(e)}")
+        logger.error(f"Migration failed: {str(e)}")
         return jsonify({"message": f"Migration failed: {str(e)}"}), 500
 
 
 @app.route("/register-users", methods=["GET"])
 def register_users_endpoint():
     """Manually register test users inside Flask app context."""
-    print("[INFO] Registering Users...")
+    logger.info("Registering Users...")
     try:
         with app.app_context():
             register_users()
         return jsonify({"message": "Users registered successfully."}), 200
     except Exception as e:
-        print(f"[ERROR] User registration failed: {str(e)}")
+        logger.error(f"User registration failed: {str(e)}")
         return jsonify({"message": f"User registration failed: {str(e)}"}), 500
 
 
 @app.route("/login-users", methods=["GET"])
 def login_users_endpoint():
     """Manually log in users and retrieve JWT tokens inside Flask app context."""
-    print("[INFO] Logging in Users...")
+    logger.info("Logging in Users...")
     try:
         with app.app_context():
             user_tokens = login_users()
         return jsonify({"message": "Users logged in successfully.", "tokens": user_tokens}), 200
     except Exception as e:
-        print(f"[ERROR] User login failed: {str(e)}")
+        logger.error(f"User login failed: {str(e)}")
         return jsonify({"message": f"User login failed: {str(e)}"}), 500
 
 
 @app.route("/pass-diet-data", methods=["GET"])
 def pass_diet_data_endpoint():
     """Manually send diet data for users inside Flask app context."""
-    print("[INFO] Passing User Diet Data...")
+    logger.info("Passing User Diet Data...")
     try:
         with app.app_context():
             user_tokens = login_users()
             pass_user_data(user_tokens)
         return jsonify({"message": "Diet data passed successfully."}), 200
     except Exception as e:
-        print(f"[ERROR] Passing diet data failed: {str(e)}")
+        logger.error(f"Passing diet data failed: {str(e)}")
         return jsonify({"message": f"Passing diet data failed: {str(e)}"}), 500
 
 
 @app.route("/train-model", methods=["GET"])
 def train_model_endpoint():
     """Manually train the machine learning model inside Flask app context."""
-    print("[INFO] Training Model...")
+    logger.info("Training Model...")
     try:
         with app.app_context():
             user_tokens = login_users()
             train_model(user_tokens)
         return jsonify({"message": "Model trained successfully."}), 200
     except Exception as e:
-        print(f"[ERROR] Model training failed: {str(e)}")
+        logger.error(f"Model training failed: {str(e)}")
         return jsonify({"message": f"Model training failed: {str(e)}"}), 500
 
 
 @app.route("/run-predictions", methods=["GET"])
 def run_predictions_endpoint():
     """Manually run predictions for users inside Flask app context."""
-    print("[INFO] Running Predictions...")
+    logger.info("Running Predictions...")
     try:
         with app.app_context():
             user_tokens = login_users()
             test_prediction(user_tokens)
         return jsonify({"message": "Predictions completed successfully."}), 200
     except Exception as e:
-        print(f"[ERROR] Predictions failed: {str(e)}")
+        logger.error(f"Predictions failed: {str(e)}")
         return jsonify({"message": f"Predictions failed: {str(e)}"}), 500
 
 
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.process_local import ProcessLocal
+from config import Config
+
+
+class HasherBusy(RuntimeError):
+    """Too many password hashes are already queued; the caller should retry later."""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small bounded thread pool.
+
+    hashlib's scrypt and pbkdf2 release the GIL, so the pool caps how many
+    cores a login storm can take, and `max_pending` caps how many requests
+    may wait for it. Past that, callers get HasherBusy instead of queueing
+    and holding their web worker.
+    """
+
+    def __init__(self, method: str, max_workers: int = 2, max_pending: int = 16, wait_timeout: float = 5.0):
+        self.method = method
+        self.max_workers = max_workers
+        self.wait_timeout = wait_timeout
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ProcessLocal(
+            lambda: ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher"))
+        self._method_prefix: Optional[str] = None
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        if not pwhash or password is None:
+            return False
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """True when `pwhash` was made with different parameters than the configured ones."""
+        if self._method_prefix is None:
+            # werkzeug writes defaults out in full ("scrypt" -> "scrypt:32768:8:1"), so ask it once
+            self._method_prefix = self.hash("").split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._method_prefix
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HasherBusy("Too many concurrent password checks, try again shortly")
+        try:
+            return self._executor.get().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hasher = PasswordHasher(
+    method=Config.PASSWORD_HASH_METHOD,
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    wait_timeout=Config.PASSWORD_HASH_WAIT_TIMEOUT,
+)
@@ -0,0 +1,137 @@
+import math
+import re
+from functools import partial
+from operator import methodcaller
+from typing import Iterable, List
+
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields
+
+# orjson writes 1e16 / 1e-7 where json.dumps writes 1e+16 / 1e-07
+_EXPONENT = re.compile(rb"[0-9]e")
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+def _escape_char(match) -> str:
+    # Same escapes as json.dumps(ensure_ascii=True), including surrogate pairs
+    n = ord(match.group())
+    if n < 0x10000:
+        return f"\\u{n:04x}"
+    n -= 0x10000
+    return f"\\u{0xd800 | (n >> 10):04x}\\u{0xdc00 | (n & 0x3ff):04x}"
+
+
+def _has_non_finite(obj) -> bool:
+    """True if a float anywhere in nested dicts, lists and tuples is NaN or infinite."""
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, encoding compact responses with orjson when it is installed.
+
+    JSON_BACKEND picks the encoder: "auto" (orjson if importable), "orjson"
+    (fail at startup without it) or "stdlib". Output is byte-for-byte what
+    DefaultJSONProvider produces: keys sorted, non-ASCII escaped, dates and
+    dataclasses passed to `default`. Anything orjson would write differently
+    (exponent floats, non-str keys, DEL characters, NaN and Infinity, which
+    it writes as null) is re-encoded with the stdlib instead. Indented
+    output (DEBUG) always uses the stdlib.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._orjson = None
+        backend = app.config.get("JSON_BACKEND", "auto")
+        if backend != "stdlib":
+            try:
+                import orjson  # Optional dependency
+            except ImportError:
+                if backend == "orjson":
+                    raise
+            else:
+                self._orjson = orjson
+
+    def _encode(self, obj):
+        """Compact JSON bytes from orjson, or None when only the stdlib gives the expected bytes."""
+        orjson = self._orjson
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            data = orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:  # orjson.JSONEncodeError: non-str keys, big ints, ...
+            return None
+
+        if _EXPONENT.search(data) or b"\x7f" in data:
+            return None
+        # orjson writes NaN and Infinity as null; only then is the object worth walking
+        if b"null" in data and _has_non_finite(obj):
+            return None
+        if self.ensure_ascii and not data.isascii():
+            data = _NON_ASCII.sub(_escape_char, data.decode()).encode()
+        return data
+
+    def _compact(self) -> bool:
+        return not ((self.compact is None and self._app.debug) or self.compact is False)
+
+    def response(self, *args, **kwargs):
+        if self._orjson is None or not self._compact():
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        data = self._encode(obj)
+        if data is None:
+            data = super().dumps(obj, separators=(",", ":")).encode()
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
+
+
+class RowDumper:
+    """`schema.dump` precompiled for rows selected as tuples, without ORM objects.
+
+    Select `dumper.columns` and pass each row to `dump`; the result equals
+    `schema.dump(obj)` for the same database row. Field types whose dump is
+    the value itself skip marshmallow entirely, dates become `isoformat()`,
+    and anything else goes through the field's own `_serialize`.
+    """
+
+    def __init__(self, schema, model):
+        dump_fields = schema.dump_fields
+        self.keys = [field.data_key or name for name, field in dump_fields.items()]
+        self.columns = [getattr(model, field.attribute or name) for name, field in dump_fields.items()]
+        self._converters = [
+            (key, converter)
+            for key, (name, field) in zip(self.keys, dump_fields.items())
+            if (converter := self._converter(name, field)) is not None
+        ]
+
+    @staticmethod
+    def _converter(name, field):
+        kind = type(field)
+        if kind in (fields.Integer, fields.String, fields.Boolean) and not getattr(field, "as_string", False):
+            return None
+        if kind is fields.Float and not field.as_string:
+            return float
+        if kind in (fields.DateTime, fields.Date) and field.format in (None, "iso"):
+            return methodcaller("isoformat")
+        return partial(field._serialize, attr=name, obj=None)
+
+    def dump(self, row) -> dict:
+        data = dict(zip(self.keys, row))
+        for key, convert in self._converters:
+            value = data[key]
+            if value is not None:
+                data[key] = convert(value)
+        return data
+
+    def dump_many(self, rows: Iterable) -> List[dict]:
+        return [self.dump(row) for row in rows]
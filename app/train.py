@@ -1,53 +1,245 @@
+import logging
 import os
-import pandas as pd
-import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+import time
+import uuid
+from typing import TYPE_CHECKING, NamedTuple, Optional
+from config import Config
+
+# pandas, joblib and sklearn are imported where they are used: importing this
+# module for its paths (registry, jobs, ad_model) must not load them
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+logger = logging.getLogger(__name__)
 
 MODEL_PATH = "diet_model.pkl"
+FLAT_MODEL_PATH = "diet_model.flat.pkl"  # ✅ Plain NumPy layout, memory-mapped by serving workers
 FEATURES_PATH = "model_features.pkl"  # ✅ Save feature names
+VERSION_PATH = "diet_model.version"  # ✅ Written last, signals a complete model to other workers
+WATERMARK_PATH = "diet_model.watermark"  # ✅ Highest diet_data id the saved model has seen
+MIN_TRAINING_ROWS = 5
+ARTIFACT_DIR = os.path.abspath(os.path.dirname(__file__))
+
+
+class TrainingConfig(NamedTuple):
+    """RandomForest settings. `warm_start` grows the saved forest instead of refitting it."""
+    n_estimators: int = 100
+    n_jobs: Optional[int] = 1
+    max_depth: Optional[int] = None
+    warm_start: bool = False
+    warm_start_trees: int = 20
+    data_source: str = "csv"
+    incremental: bool = False
+    chunk_size: int = 5000
+
+    @classmethod
+    def from_config(cls, config=Config) -> "TrainingConfig":
+        return cls(
+            n_estimators=config.DIET_MODEL_N_ESTIMATORS,
+            n_jobs=config.DIET_MODEL_N_JOBS,
+            max_depth=config.DIET_MODEL_MAX_DEPTH,
+            warm_start=config.DIET_MODEL_WARM_START,
+            warm_start_trees=config.DIET_MODEL_WARM_START_TREES,
+            data_source=config.DIET_MODEL_DATA_SOURCE,
+            incremental=config.DIET_MODEL_INCREMENTAL,
+            chunk_size=config.DIET_MODEL_CHUNK_SIZE,
+        )
+
+
+def _atomic_write(path, write):
+    """Write to a temp file next to `path` and rename it over, so readers never see a partial file."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_artifacts(model, feature_columns, base_dir=ARTIFACT_DIR):
+    """Save model and feature names, then bump the version marker. Returns the new version."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    _atomic_write(os.path.join(base_dir, FEATURES_PATH), lambda p: joblib.dump(feature_columns, p))
+    _atomic_write(os.path.join(base_dir, MODEL_PATH), lambda p: joblib.dump(model, p))
+    if isinstance(model, RandomForestClassifier):
+        from app.flat_forest import FlatForest
+        flat = FlatForest.from_forest(model)
+        _atomic_write(os.path.join(base_dir, FLAT_MODEL_PATH), lambda p: joblib.dump(flat, p))
+
+    version = uuid.uuid4().hex
+    def write_version(p):
+        with open(p, "w") as f:
+            f.write(version)
+    _atomic_write(os.path.join(base_dir, VERSION_PATH), write_version)
+
+    return version
+
+
+def read_watermark(base_dir=ARTIFACT_DIR) -> Optional[int]:
+    try:
+        with open(os.path.join(base_dir, WATERMARK_PATH)) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_watermark(watermark: int, base_dir=ARTIFACT_DIR) -> None:
+    def write(p):
+        with open(p, "w") as f:
+            f.write(str(watermark))
+    _atomic_write(os.path.join(base_dir, WATERMARK_PATH), write)
+
+
+def load_csv_data(base_dir=ARTIFACT_DIR) -> "pd.DataFrame":
+    import pandas as pd
 
-def train_model():
-    """Train the model using diet data from an absolute path."""
-    base_dir = os.path.abspath(os.path.dirname(__file__))  # ✅ Correct base path
     data_path = os.path.join(base_dir, "data/Diet_Data.csv")  # ✅ Looks inside `app/data/`
-    
-    print(f"[INFO] Loading dataset from: {data_path}")  # Debugging
-    
+
+    logger.info(f"Loading dataset from: {data_path}")  # Debugging
+
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"[ERROR] Data file not found at {data_path}")
 
-    data = pd.read_csv(data_path)
+    return pd.read_csv(data_path)
+
+
+def _warm_start_model(training_config, feature_columns, labels, base_dir):
+    """Previously saved forest set up to grow extra trees, or None if it cannot be reused."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = load_model()
+    if not isinstance(model, RandomForestClassifier):
+        return None
+
+    try:
+        saved_columns = joblib.load(os.path.join(base_dir, FEATURES_PATH))
+    except FileNotFoundError:
+        return None
+
+    # New trees must see the same feature layout and classes as the existing ones
+    if list(saved_columns) != list(feature_columns) or set(model.classes_) != set(labels):
+        logger.info("Features or classes changed, refitting the forest from scratch")
+        return None
+
+    # Growing without limit would make the artifact and every prediction slower on each retrain
+    n_estimators = len(model.estimators_) + training_config.warm_start_trees
+    if n_estimators > training_config.n_estimators + training_config.warm_start_trees:
+        logger.info(f"Forest would grow to {n_estimators} trees, refitting it from scratch")
+        return None
+
+    model.set_params(
+        warm_start=True,
+        n_estimators=n_estimators,
+        n_jobs=training_config.n_jobs,
+    )
+    return model
+
+
+def build_model(training_config: TrainingConfig) -> "RandomForestClassifier":
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(
+        n_estimators=training_config.n_estimators,
+        n_jobs=training_config.n_jobs,
+        max_depth=training_config.max_depth,
+        random_state=42,
+    )
+
+
+def train_model(training_config: Optional[TrainingConfig] = None):
+    """Train the model from the configured data source (CSV file or the diet_data table).
+
+    Returns (model, X_test, y_test), or None when an incremental run finds
+    fewer than MIN_TRAINING_ROWS new rows and leaves the saved model as is.
+    """
+    import joblib
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    training_config = training_config or TrainingConfig.from_config()
+    base_dir = os.path.abspath(os.path.dirname(__file__))  # ✅ Correct base path
+
+    since_id = watermark = None
+    if training_config.data_source == "database":
+        from app.training_data import load_diet_table  # Imports the ORM models, only needed here
+
+        since_id = read_watermark(base_dir) if training_config.incremental else None
+        logger.info(f"Loading labelled diet_data rows after id {since_id or 0}")
+        data, watermark = load_diet_table(since_id, training_config.chunk_size)
+    else:
+        data = load_csv_data(base_dir)
+
+    if len(data) < MIN_TRAINING_ROWS and since_id is not None:
+        if os.path.exists(os.path.join(base_dir, MODEL_PATH)):
+            # Nothing (or almost nothing) new: keep the model and the watermark as they are
+            logger.info(f"Only {len(data)} new labelled rows since id {since_id}, keeping the current model")
+            return None
+        return train_model(training_config._replace(incremental=False, warm_start=False))
+    if len(data) < MIN_TRAINING_ROWS:
+        raise ValueError(f"[ERROR] Only {len(data)} labelled rows to train on, need {MIN_TRAINING_ROWS}")
 
     # ✅ Convert categorical features into dummy variables
     X = data[['age', 'gender', 'height', 'weight', 'activity_level', 'goal', 'dietary_preference']]
     y = data['recommended_diet']
     X = pd.get_dummies(X)  # Converts categorical features into multiple columns
 
-    # ✅ Save the feature names for prediction
-    joblib.dump(X.columns, os.path.join(base_dir, FEATURES_PATH))
+    # New rows only: keep the saved feature layout so the extra trees fit the existing forest
+    if since_id is not None:
+        try:
+            X = X.reindex(columns=joblib.load(os.path.join(base_dir, FEATURES_PATH)), fill_value=0)
+        except FileNotFoundError:
+            pass
 
     # Split dataset
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Fit on plain arrays: serving passes encoder rows (no column names) and a forest
+    # fitted on a DataFrame warns on each of those. The column order is saved separately.
+    X_train, X_test = X_train.to_numpy(dtype="float64"), X_test.to_numpy(dtype="float64")
+
+    # Train model, growing the saved forest when warm start is enabled
+    model = None
+    if training_config.warm_start or training_config.incremental:
+        model = _warm_start_model(training_config, X.columns, y_train.unique(), base_dir)
+    if model is None and training_config.incremental and training_config.data_source == "database":
+        # Nothing to grow, so train on the whole table instead of just the new rows
+        logger.info("Saved forest cannot be extended, falling back to a full retrain")
+        return train_model(training_config._replace(incremental=False, warm_start=False))
+    if model is None:
+        model = build_model(training_config)
 
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    start = time.perf_counter()
     model.fit(X_train, y_train)
+    logger.info(f"Fitted {len(model.estimators_)} trees in {time.perf_counter() - start:.2f}s (n_jobs={model.n_jobs})")
 
-    # Save model
-    joblib.dump(model, os.path.join(base_dir, MODEL_PATH))
+    # Single-row predictions are slower with a thread pool, so serve with one core
+    model.set_params(n_jobs=1, warm_start=False)
+
+    # ✅ Save model and feature names, then hand them to this worker's registry
+    version = save_artifacts(model, X.columns, base_dir)
+    if watermark is not None:
+        write_watermark(watermark, base_dir)
+
+    from app.registry import diet_registry  # Imported here, the registry imports this module
+    diet_registry.publish(model, X.columns, version)
 
     return model, X_test, y_test
 
 
 def load_model():
+    import joblib
+
     # Ensure input has same columns as training data
     base_dir = os.path.abspath(os.path.dirname(__file__))  # Gets `/home/kollie/flask-project/ad-backend-flask-webhook/app/`
 
         # ✅ Construct the correct file path
     model_path_ = os.path.join(base_dir, "diet_model.pkl")
 
-    print(f"[INFO] Loading model from: {model_path_}")
+    logger.info(f"Loading model from: {model_path_}")
     try:
         return joblib.load(model_path_)
     except FileNotFoundError:
@@ -0,0 +1,82 @@
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy import create_engine, select
+
+from app.encoder import CATEGORICAL_FEATURES, RAW_FEATURES
+from app.models import DietData
+from config import Config
+
+LABEL = "recommended_diet"
+NUMERIC_DTYPES = {"id": "int64", "age": "int32", "height": "float64", "weight": "float64"}
+
+
+def _typed(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = chunk.astype(NUMERIC_DTYPES)
+    for name in (*CATEGORICAL_FEATURES, LABEL):
+        chunk[name] = chunk[name].astype("category")
+    return chunk
+
+
+def iter_diet_chunks(engine, chunk_size: int = 5000, since_id: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Yield labelled `diet_data` rows in id order, `chunk_size` rows at a time.
+
+    Each chunk is a keyset query (`id > last seen id`), so the database only
+    ever materialises one chunk and no OFFSET scan grows with the table.
+    """
+    table = DietData.__table__
+    columns = [table.c.id, *(table.c[name] for name in RAW_FEATURES), table.c[LABEL]]
+    last_id = since_id or 0
+
+    while True:
+        query = (
+            select(*columns)
+            .where(table.c.id > last_id, table.c[LABEL].isnot(None))
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        )
+        with engine.connect() as conn:
+            chunk = pd.read_sql(query, conn)
+        if chunk.empty:
+            return
+
+        last_id = int(chunk["id"].iloc[-1])
+        yield _typed(chunk)
+
+
+def load_diet_table(since_id: Optional[int] = None, chunk_size: int = 5000,
+                    database_uri: Optional[str] = None) -> Tuple[pd.DataFrame, Optional[int]]:
+    """Read labelled diet rows newer than `since_id` into one frame.
+
+    Chunks are read one query at a time, but the result is the whole
+    selection in memory, as the forest fit needs it.
+
+    Returns the frame and its highest id (the next watermark), or `since_id`
+    when there is nothing new. Uses its own engine so it also works from the
+    training process pool, outside any Flask app context.
+    """
+    engine = create_engine(database_uri or Config.SQLALCHEMY_DATABASE_URI)
+    try:
+        chunks = list(iter_diet_chunks(engine, chunk_size, since_id))
+    finally:
+        engine.dispose()
+
+    if not chunks:
+        columns = ["id", *RAW_FEATURES, LABEL]
+        return pd.DataFrame(columns=columns), since_id
+
+    # Joined one column at a time, dropping each from the chunks once joined,
+    # rather than holding every chunk next to a full concatenated copy
+    columns = {}
+    for name in list(chunks[0].columns):
+        if name in (*CATEGORICAL_FEATURES, LABEL):
+            columns[name] = union_categoricals([chunk[name] for chunk in chunks], sort_categories=True)
+        else:
+            columns[name] = np.concatenate([chunk[name].to_numpy() for chunk in chunks])
+        for chunk in chunks:
+            del chunk[name]
+
+    data = pd.DataFrame(columns)
+    return data, int(data["id"].iloc[-1])
@@ -0,0 +1,61 @@
+import logging
+import os
+import time
+
+from sqlalchemy import text
+
+from app import db
+from app.registry import ad_registry, diet_registry
+
+logger = logging.getLogger(__name__)
+
+_fork_hook_registered = False
+
+
+def warm_up(app) -> dict:
+    """Pay the first-request costs up front: models, DB connection and one prediction.
+
+    Loads both models from the registries (which imports NumPy and sklearn),
+    opens a pooled database connection and runs a dummy prediction through
+    each model, so lazily compiled paths are ready too. Call it once per
+    worker before it takes traffic; main.py does when WARMUP_ON_START is set.
+    An untrained model is logged and skipped. Returns the seconds per step.
+    """
+    global _fork_hook_registered
+    timings = {}
+
+    start = time.perf_counter()
+    with app.app_context():
+        engine = db.engine
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    timings["db_connect"] = time.perf_counter() - start
+    if not _fork_hook_registered:
+        # Connections opened before a fork belong to the parent; the child opens its own.
+        # The hook runs outside any app context, so it holds the engine itself.
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+        _fork_hook_registered = True
+
+    start = time.perf_counter()
+    try:
+        bundle = diet_registry.get()
+    except FileNotFoundError:
+        logger.warning("Warm-up: diet model not trained yet, skipping")
+    else:
+        from app.encoder import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+        record = {**{name: 0 for name in NUMERIC_FEATURES}, **{name: None for name in CATEGORICAL_FEATURES}}
+        bundle.model.predict(bundle.encoder.encode(record).reshape(1, -1))
+        timings["diet_model"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        bundle = ad_registry.get()
+    except FileNotFoundError:
+        logger.warning("Warm-up: ad model not trained yet, skipping")
+    else:
+        import numpy as np
+        bundle.model.predict(np.zeros((1, len(bundle.feature_columns))))
+        timings["ad_model"] = time.perf_counter() - start
+
+    logger.info("Worker warmed up", extra={f"{name}_ms": round(seconds * 1000, 1) for name, seconds in timings.items()})
+    return timings
@@ -0,0 +1,115 @@
+"""Artifact size, load time and per-worker memory: pickled forest vs. memory-mapped FlatForest.
+
+Run from the repository root (Linux, reads /proc for RSS/PSS):
+
+    python benchmarks/bench_artifacts.py [--rows 20000] [--trees 100] [--workers 4] [--batch 10000]
+
+Scores one `--batch`-row batch in process with both models first, as
+/predict_food/batch does. Each worker is a fresh process that loads the artifact and scores a batch.
+RSS counts shared pages in every process; PSS splits them between the
+processes sharing them, so it shows what N workers really cost together.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.encoder import RAW_FEATURES  # noqa: E402
+from app.flat_forest import FlatForest  # noqa: E402
+from app.train import TrainingConfig, build_model  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "Diet_Data.csv")
+
+
+def memory_kb():
+    """(rss, pss) of this process in kB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def worker(path, mmap_mode, X, barrier, results):
+    rss_before, _ = memory_kb()
+    start = time.perf_counter()
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    load_seconds = time.perf_counter() - start
+    model.predict(X)
+
+    # Wait until every worker has its model mapped before measuring sharing
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put((load_seconds, rss - rss_before, rss, pss))
+    barrier.wait()
+
+
+def measure(path, mmap_mode, X, n_workers):
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(n_workers), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, mmap_mode, X, barrier, results)) for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    rows = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return np.mean(rows, axis=0), sum(row[3] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    data = pd.read_csv(DATA_PATH).sample(n=args.rows, replace=True, random_state=0)
+    # Jitter the numeric columns so trees grow to a realistic size
+    rng = np.random.default_rng(0)
+    for name in ("age", "height", "weight"):
+        data[name] = data[name] + rng.normal(0, 1, len(data))
+    X = pd.get_dummies(data[list(RAW_FEATURES)])
+    y = data["recommended_diet"]
+
+    X = X.to_numpy(dtype=np.float64)  # As train_model() fits it
+    forest = build_model(TrainingConfig(n_estimators=args.trees)).fit(X, y)
+    flat = FlatForest.from_forest(forest)
+    X_sample = X[:1000]
+    if not np.array_equal(flat.predict(X_sample), forest.predict(X_sample)):
+        raise SystemExit("[ERROR] FlatForest predictions differ from the forest")
+
+    X_batch = X[np.arange(args.batch) % len(X)]
+    for name, model in (("pickled forest", forest), ("flat forest", flat)):
+        start = time.perf_counter()
+        model.predict(X_batch)
+        print(f"[INFO] {name}: {args.batch} rows x {args.trees} trees scored in "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifacts = {
+            "pickled forest": (os.path.join(tmp, "diet_model.pkl"), forest, None),
+            "flat forest (mmap)": (os.path.join(tmp, "diet_model.flat.pkl"), flat, "r"),
+        }
+        print(f"{'artifact':<20} {'size MB':>8} {'load ms':>8} {'+RSS MB':>8} {'RSS MB':>8} "
+              f"{'PSS MB':>8} {f'PSS x{args.workers} MB':>12}")
+        for name, (path, model, mmap_mode) in artifacts.items():
+            joblib.dump(model, path)
+            size_mb = os.path.getsize(path) / 2**20
+            (load_s, rss_delta, rss, pss), total_pss = measure(path, mmap_mode, X_sample, args.workers)
+            print(f"{name:<20} {size_mb:>8.1f} {load_s * 1e3:>8.1f} {rss_delta / 1024:>8.1f} "
+                  f"{rss / 1024:>8.1f} {pss / 1024:>8.1f} {total_pss / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Microbenchmark: FeatureEncoder vs. the pd.get_dummies + reindex path.
+
+Run from the repository root:
+
+    python benchmarks/bench_encoder.py [--repeat 2000]
+
+Checks that both paths produce identical float64 rows for every record in
+app/data/Diet_Data.csv, then times single-row and whole-batch encoding.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.encoder import FeatureEncoder, RAW_FEATURES  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "Diet_Data.csv")
+
+
+def pandas_encode(records, feature_columns):
+    df = pd.get_dummies(pd.DataFrame(records))
+    return df.reindex(columns=feature_columns, fill_value=0).to_numpy(dtype=np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="iterations per timing")
+    args = parser.parse_args()
+
+    data = pd.read_csv(DATA_PATH)
+    feature_columns = pd.get_dummies(data[list(RAW_FEATURES)]).columns
+    records = data[list(RAW_FEATURES)].to_dict("records")
+    encoder = FeatureEncoder(feature_columns)
+
+    for record in records:
+        expected = pandas_encode([record], feature_columns)[0]
+        if not np.array_equal(encoder.encode(record), expected):
+            raise SystemExit(f"[ERROR] Encoder mismatch for {record}")
+    if not np.array_equal(encoder.transform(records), pandas_encode(records, feature_columns)):
+        raise SystemExit("[ERROR] Encoder batch mismatch")
+    print(f"[INFO] Outputs identical for {len(records)} records, {encoder.n_features} features")
+
+    record = records[0]
+    row = np.zeros(encoder.n_features, dtype=np.float64)
+    timings = {
+        "pandas single row": lambda: pandas_encode([record], feature_columns),
+        "encoder single row": lambda: encoder.encode(record),
+        "encoder single row (preallocated)": lambda: encoder.encode(record, out=row),
+        f"pandas batch ({len(records)} rows)": lambda: pandas_encode(records, feature_columns),
+        f"encoder batch ({len(records)} rows)": lambda: encoder.transform(records),
+    }
+    for name, fn in timings.items():
+        seconds = timeit.timeit(fn, number=args.repeat) / args.repeat
+        print(f"{name:<40} {seconds * 1e6:10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
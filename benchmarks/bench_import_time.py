@@ -0,0 +1,77 @@
+"""Cold-start cost of `import app`, from a `python -X importtime` report.
+
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py [--top 15] [--warm-up]
+
+Imports the app in a fresh interpreter with `-X importtime`, prints the total
+and the slowest top-level imports, and fails if any of LAZY_MODULES was loaded:
+those belong to the endpoints (or the warm-up) that use them. `--warm-up`
+also times `app.warmup.warm_up` in that interpreter.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LAZY_MODULES = ("numpy", "pandas", "sklearn", "scipy", "joblib", "requests")
+
+WARM_UP_SNIPPET = """
+import time
+from app import app
+from app.warmup import warm_up
+start = time.perf_counter()
+timings = warm_up(app)
+print("WARMUP", round((time.perf_counter() - start) * 1000, 1), timings)
+"""
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) for every line of an importtime report."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warm-up", action="store_true")
+    args = parser.parse_args()
+
+    env = {**os.environ, "SQLALCHEMY_DATABASE_URI": os.environ.get("SQLALCHEMY_DATABASE_URI", "sqlite://")}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(f"[ERROR] import app failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    total_us = sum(self_us for _, self_us, _, _ in entries)
+    top_level = sorted((e for e in entries if e[3] <= 1), key=lambda e: e[2], reverse=True)
+
+    print(f"[INFO] import app: {total_us / 1000:.1f} ms across {len(entries)} modules")
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"    {cumulative_us / 1000:9.1f} ms  {name}")
+
+    loaded = sorted({name.split(".")[0] for name, *_ in entries} & set(LAZY_MODULES))
+    if loaded:
+        raise SystemExit(f"[ERROR] import app loaded {', '.join(loaded)}; import them where they are used")
+
+    if args.warm_up:
+        result = subprocess.run([sys.executable, "-c", WARM_UP_SNIPPET], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise SystemExit(f"[ERROR] warm-up failed:\n{result.stderr[-2000:]}")
+        line = next(line for line in result.stdout.splitlines() if line.startswith("WARMUP"))
+        _, total_ms, timings = line.split(" ", 2)
+        print(f"[INFO] warm_up: {total_ms} ms {timings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Lookup latency for the hot diet_data / users queries with and without indexes.
+
+Run from the repository root:
+
+    python benchmarks/bench_indexes.py [--rows 1000000] [--users 100000] [--lookups 200]
+
+Builds a SQLite file from the real model tables, times the lookups with
+the indexes dropped, then creates the indexes declared in app/models.py
+and times them again.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+
+from app import db  # noqa: E402
+from app.models import DietData, Users  # noqa: E402
+
+BATCH = 50000
+
+
+def seed(engine, n_rows, n_users):
+    users, diet = Users.__table__, DietData.__table__
+    with engine.begin() as conn:
+        conn.execute(insert(users), [
+            {"id": i, "first_name": "First", "last_name": "Last", "username": f"user{i}", "password": "x"}
+            for i in range(1, n_users + 1)
+        ])
+        rng = random.Random(0)
+        for start in range(0, n_rows, BATCH):
+            conn.execute(insert(diet), [
+                {"user_id": rng.randint(1, n_users), "age": 30, "gender": "Male", "height": 175.0,
+                 "weight": 75.0, "activity_level": "Moderate", "goal": "Muscle Gain",
+                 "dietary_preference": "Balanced"}
+                for _ in range(min(BATCH, n_rows - start))
+            ])
+
+
+def time_lookups(engine, n_users, n_lookups):
+    users, diet = Users.__table__, DietData.__table__
+    rng = random.Random(1)
+    queries = {
+        "latest diet row for user": lambda uid: select(diet).where(diet.c.user_id == uid)
+        .order_by(diet.c.id.desc()).limit(1),
+        "all diet rows for user": lambda uid: select(diet).where(diet.c.user_id == uid),
+        "user by username": lambda uid: select(users).where(users.c.username == f"user{uid}").limit(1),
+    }
+    results = {}
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            start = time.perf_counter()
+            for _ in range(n_lookups):
+                conn.execute(query(rng.randint(1, n_users))).fetchall()
+            results[name] = (time.perf_counter() - start) / n_lookups
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    indexes = [*Users.__table__.indexes, *DietData.__table__.indexes]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db.metadata.create_all(engine)
+        for index in indexes:
+            index.drop(engine)
+
+        print(f"[INFO] Seeding {args.rows} diet rows for {args.users} users...")
+        seed(engine, args.rows, args.users)
+        before = time_lookups(engine, args.users, args.lookups)
+
+        start = time.perf_counter()
+        for index in indexes:
+            index.create(engine)
+        print(f"[INFO] Created {len(indexes)} indexes in {time.perf_counter() - start:.1f}s")
+        after = time_lookups(engine, args.users, args.lookups)
+
+    print(f"{'lookup':<28} {'no index ms':>12} {'indexed ms':>12} {'speedup':>9}")
+    for name in before:
+        print(f"{name:<28} {before[name] * 1e3:>12.3f} {after[name] * 1e3:>12.3f} {before[name] / after[name]:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
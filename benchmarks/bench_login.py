@@ -0,0 +1,70 @@
+"""Login throughput through the Flask test client, plus the token-issue cost on its own.
+
+Run from the repository root:
+
+    python benchmarks/bench_login.py [--users 20] [--logins 200] [--threads 4]
+
+Uses an in-memory SQLite database. Most of a login is the password hash,
+so --hash-method lets you compare parameters, e.g. "pbkdf2:sha256:600000".
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--users", type=int, default=20)
+parser.add_argument("--logins", type=int, default=200)
+parser.add_argument("--threads", type=int, default=4)
+parser.add_argument("--hash-method", default=None)
+args = parser.parse_args()
+
+# Both are read when the app is imported
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+if args.hash_method:
+    os.environ["PASSWORD_HASH_METHOD"] = args.hash_method
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_jwt_extended import decode_token  # noqa: E402
+
+from app import app, db  # noqa: E402
+from app.models import Users  # noqa: E402
+from app.resources.user import issue_tokens  # noqa: E402
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        for i in range(args.users):
+            client.post("/register", json={"first_name": "F", "last_name": "L", "username": f"user{i}", "password": "pw"})
+
+        user = Users.find_by_username("user0")
+        issue = timed(lambda: issue_tokens(user), 1000)
+        issue_and_decode = timed(lambda: decode_token(issue_tokens(user)["access_token"]), 1000)
+        print(f"[INFO] issue_tokens: {issue * 1e6:.0f} us, with the old decode_token round trip: "
+              f"{issue_and_decode * 1e6:.0f} us")
+
+    def login(i):
+        response = app.test_client().post("/login", json={"username": f"user{i % args.users}", "password": "pw"})
+        return response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        codes = list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+
+    print(f"[INFO] {args.logins} logins on {args.threads} threads: {args.logins / elapsed:.1f} logins/s, "
+          f"status codes {sorted(set(codes))}")
+
+
+if __name__ == "__main__":
+    main()
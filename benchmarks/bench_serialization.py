@@ -0,0 +1,86 @@
+"""Marshmallow + stdlib JSON vs RowDumper + FastJSONProvider for diet data listings.
+
+Run from the repository root:
+
+    python benchmarks/bench_serialization.py [--users 2000] [--rows-per-user 5] [--repeat 5]
+
+Seeds an in-memory database and serializes every diet row both ways: ORM
+objects through `DietDataSchema(many=True).dump` and Flask's stdlib provider,
+and column-projected tuples through `RowDumper` and the app's provider
+(orjson when installed). Fails if the two response bodies differ by a byte.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app import app, db  # noqa: E402
+from app.models import DietData, Users  # noqa: E402
+from app.resources.result import diet_data_schema, diet_dumper  # noqa: E402
+
+
+def seed(n_users, rows_per_user):
+    db.create_all()
+    now = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    db.session.bulk_insert_mappings(Users, [
+        {"id": i, "first_name": "Fírst", "last_name": "Last", "username": f"user{i}", "password": "x"}
+        for i in range(1, n_users + 1)
+    ])
+    db.session.bulk_insert_mappings(DietData, [
+        {"user_id": i, "age": 20 + j, "gender": "Female", "height": 162.5, "weight": 58.3 + j,
+         "activity_level": "Moderate", "goal": "Weight Loss", "dietary_preference": "Vegetarian",
+         "recommended_diet": None if j % 2 else "Low Carb", "created_at": now, "updated_at": now}
+        for i in range(1, n_users + 1) for j in range(rows_per_user)
+    ])
+    db.session.commit()
+
+
+def best_of(repeat, fn):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rows-per-user", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        seed(args.users, args.rows_per_user)
+        stdlib_json = DefaultJSONProvider(app)
+
+        def baseline():
+            db.session.expunge_all()
+            return stdlib_json.response({"diet_data": diet_data_schema.dump(DietData.query.order_by(DietData.id).all())}).data
+
+        def fast():
+            rows = db.session.query(*diet_dumper.columns).order_by(DietData.id)
+            return app.json.response({"diet_data": diet_dumper.dump_many(rows)}).data
+
+        baseline_seconds, expected = best_of(args.repeat, baseline)
+        fast_seconds, actual = best_of(args.repeat, fast)
+
+    if actual != expected:
+        raise SystemExit("[ERROR] Fast serialization output differs from marshmallow + stdlib json")
+
+    rows = args.users * args.rows_per_user
+    print(f"[INFO] JSON encoder: {type(app.json).__name__} ({'orjson' if app.json._orjson else 'stdlib'})")
+    print(f"[INFO] marshmallow + stdlib: {rows} rows in {baseline_seconds * 1000:.1f} ms")
+    print(f"[INFO] RowDumper + provider: {rows} rows in {fast_seconds * 1000:.1f} ms "
+          f"({baseline_seconds / fast_seconds:.1f}x), {len(actual)} identical bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Fit-time report for the diet RandomForest per core count.
+
+Run from the repository root:
+
+    python benchmarks/bench_training.py [--rows 20000] [--trees 100] [--max-depth N]
+
+Diet_Data.csv only has a handful of rows, so it is resampled with replacement
+up to --rows to get timings that say something about a real training box.
+Also times growing the fitted forest by --warm-start-trees with warm_start.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.encoder import RAW_FEATURES  # noqa: E402
+from app.train import TrainingConfig, build_model  # noqa: E402
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "data", "Diet_Data.csv")
+
+
+def core_counts():
+    cpus = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--warm-start-trees", type=int, default=20)
+    args = parser.parse_args()
+
+    data = pd.read_csv(DATA_PATH).sample(n=args.rows, replace=True, random_state=0)
+    X = pd.get_dummies(data[list(RAW_FEATURES)])
+    y = data["recommended_diet"]
+    print(f"[INFO] {len(X)} rows, {X.shape[1]} features, {args.trees} trees, max_depth={args.max_depth}")
+
+    baseline = None
+    print(f"{'n_jobs':>6} {'fit s':>8} {'speedup':>8} {'warm +trees s':>14}")
+    for n_jobs in core_counts():
+        config = TrainingConfig(n_estimators=args.trees, n_jobs=n_jobs, max_depth=args.max_depth)
+        model = build_model(config)
+
+        start = time.perf_counter()
+        model.fit(X, y)
+        fit_seconds = time.perf_counter() - start
+        baseline = baseline or fit_seconds
+
+        model.set_params(warm_start=True, n_estimators=args.trees + args.warm_start_trees)
+        start = time.perf_counter()
+        model.fit(X, y)
+        warm_seconds = time.perf_counter() - start
+
+        print(f"{n_jobs:>6} {fit_seconds:>8.2f} {baseline / fit_seconds:>7.2f}x {warm_seconds:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""SQL statement count and time for /users_diet_data on a seeded SQLite database.
+
+Run from the repository root:
+
+    python benchmarks/bench_user_diet_queries.py [--users 10000] [--rows-per-user 2]
+
+Seeds an in-memory database, walks every page of the endpoint through the
+Flask test client, and fails if any page issues more than MAX_STATEMENTS
+statements, so an N+1 regression shows up as an error rather than a slowdown.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app, db  # noqa: E402
+from app.models import DietData, Users  # noqa: E402
+
+MAX_STATEMENTS = 1
+
+
+def seed(n_users, rows_per_user):
+    db.create_all()
+    db.session.bulk_insert_mappings(Users, [
+        {"id": i, "first_name": "First", "last_name": "Last", "username": f"user{i}", "password": "x"}
+        for i in range(1, n_users + 1)
+    ])
+    db.session.bulk_insert_mappings(DietData, [
+        {"user_id": i, "age": 30, "gender": "Male", "height": 175.0, "weight": 75.0,
+         "activity_level": "Moderate", "goal": "Muscle Gain", "dietary_preference": "Balanced"}
+        for i in range(1, n_users + 1) for _ in range(rows_per_user)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--rows-per-user", type=int, default=2)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    statements = []
+    with app.app_context():
+        seed(args.users, args.rows_per_user)
+        event.listen(db.engine, "before_cursor_execute", lambda *a, **k: statements.append(a[2]))
+
+        client = app.test_client()
+        after, pages, users = 0, 0, 0
+        start = time.perf_counter()
+        while True:
+            before = len(statements)
+            response = client.get(f"/users_diet_data?after={after}&limit={args.limit}")
+            page_statements = len(statements) - before
+            if page_statements > MAX_STATEMENTS:
+                raise SystemExit(f"[ERROR] Page after={after} ran {page_statements} statements")
+
+            pages += 1
+            users += len(response.get_json())
+            after = response.headers.get("X-Next-Cursor")
+            if after is None:
+                break
+        json_seconds = time.perf_counter() - start
+
+        before = len(statements)
+        start = time.perf_counter()
+        streamed = sum(1 for _ in client.get("/users_diet_data?format=ndjson&limit=0").iter_encoded())
+        ndjson_seconds = time.perf_counter() - start
+        ndjson_statements = len(statements) - before
+
+    print(f"[INFO] JSON pages: {users} users in {pages} pages, {json_seconds:.2f}s, "
+          f"<= {MAX_STATEMENTS} statement(s) per page")
+    print(f"[INFO] NDJSON stream: {streamed} chunks, {ndjson_seconds:.2f}s, {ndjson_statements} statement(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,67 @@ class Config(object):
     SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI") \
         or "sqlite:///" + os.path.join(baseddir, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine profile, see app/db_profile.py
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS") or 5000)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE") or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW") or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT") or 10)
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE") or 1800)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS") or 30000)
     PROPAGATE_EXCEPTIONS = True
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
-    JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or "amazing-api"
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or "amazing-api"
+    # Seconds before a token revoked on one worker is rejected by the others, see app/blocklist.py
+    JWT_BLOCKLIST_SYNC_INTERVAL = float(os.environ.get("JWT_BLOCKLIST_SYNC_INTERVAL") or 1)
+
+    # main.py preloads the models, opens the DB pool and runs a dummy prediction before serving, see app/warmup.py
+    WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "true").lower() == "true"
+
+    # JSON encoder for responses: "auto" (orjson when installed), "orjson" or "stdlib"; see app/serialization.py
+    JSON_BACKEND = os.environ.get("JSON_BACKEND") or "auto"
+
+    # gzip/brotli for response bodies of at least COMPRESS_MIN_SIZE bytes (0 = off); brotli needs the brotli package
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE") or 1024)
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL") or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY") or 5)
+
+    # Rows per validation batch and transaction for POST /diet/bulk
+    DIET_BULK_BATCH_SIZE = int(os.environ.get("DIET_BULK_BATCH_SIZE") or 1000)
+
+    # GitHub webhook secret; /webhook rejects payloads without a matching X-Hub-Signature-256, and every payload when unset
+    WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+
+    # "json" or "text"; set LOG_LEVEL=WARNING in production to keep the request path silent
+    LOG_LEVEL = (os.environ.get("LOG_LEVEL") or "INFO").upper()
+    LOG_FORMAT = os.environ.get("LOG_FORMAT") or "json"
+
+    # Opt-in sampling profiler: requests slower than this dump folded stacks to PROFILE_OUTPUT_DIR (0 = off)
+    PROFILE_SLOW_REQUESTS_MS = int(os.environ.get("PROFILE_SLOW_REQUESTS_MS") or 0)
+    PROFILE_SAMPLE_INTERVAL_MS = int(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS") or 5)
+    PROFILE_OUTPUT_DIR = os.environ.get("PROFILE_OUTPUT_DIR") or os.path.join(baseddir, "profiles")
+
+    # werkzeug hash method, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Changing it rehashes on next login
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or "scrypt:32768:8:1"
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS") or 2)
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING") or 16)
+    PASSWORD_HASH_WAIT_TIMEOUT = float(os.environ.get("PASSWORD_HASH_WAIT_TIMEOUT") or 5)
+
+    # RandomForest training; see app/train.py TrainingConfig
+    DIET_MODEL_N_ESTIMATORS = int(os.environ.get("DIET_MODEL_N_ESTIMATORS") or 100)
+    DIET_MODEL_N_JOBS = int(os.environ.get("DIET_MODEL_N_JOBS") or 1)
+    DIET_MODEL_MAX_DEPTH = int(os.environ.get("DIET_MODEL_MAX_DEPTH") or 0) or None
+    DIET_MODEL_WARM_START = os.environ.get("DIET_MODEL_WARM_START", "false").lower() == "true"
+    DIET_MODEL_WARM_START_TREES = int(os.environ.get("DIET_MODEL_WARM_START_TREES") or 20)
+    # "csv" reads app/data/Diet_Data.csv, "database" streams labelled rows from diet_data
+    DIET_MODEL_DATA_SOURCE = os.environ.get("DIET_MODEL_DATA_SOURCE") or "csv"
+    DIET_MODEL_INCREMENTAL = os.environ.get("DIET_MODEL_INCREMENTAL", "false").lower() == "true"
+    DIET_MODEL_CHUNK_SIZE = int(os.environ.get("DIET_MODEL_CHUNK_SIZE") or 5000)
+    # Serve from the memory-mapped diet_model.flat.pkl instead of unpickling the forest per worker
+    DIET_MODEL_MMAP = os.environ.get("DIET_MODEL_MMAP", "true").lower() == "true"
+
+    # /predict_food result cache: "local" (per worker) or "redis" (shared, needs the redis package)
+    PREDICTION_CACHE_BACKEND = os.environ.get("PREDICTION_CACHE_BACKEND") or "local"
+    PREDICTION_CACHE_URL = os.environ.get("PREDICTION_CACHE_URL") or "redis://localhost:6379/0"
+    PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE") or 10000)
+    PREDICTION_CACHE_TTL = int(os.environ.get("PREDICTION_CACHE_TTL") or 3600)
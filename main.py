@@ -1,5 +1,13 @@
+import os
+
 from app import app as application
 from app import db
 
+# Load models, open the DB pool and run a dummy prediction before serving.
+# `flask db ...` also imports this module (FLASK_APP=main.py); those commands skip it.
+if application.config["WARMUP_ON_START"] and not os.environ.get("FLASK_RUN_FROM_CLI"):
+    from app.warmup import warm_up
+    warm_up(application)
+
 if __name__ == '__main__':
-    application.run()
\ No newline at end of file
+    application.run()